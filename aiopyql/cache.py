@@ -1,62 +1,253 @@
+import sys
 import time
-from collections import deque
+import logging
+from collections import OrderedDict
+from collections.abc import Hashable
+from aiopyql.exceptions import InvalidInputError
+
+def approximate_size(row, depth=0):
+    """
+    approximate size in bytes of a cached row or result set, containers
+    are sized with their items up to 3 levels deep, i.e list of rows
+    of column: value
+    """
+    size = sys.getsizeof(row)
+    if depth > 2:
+        return size
+    if isinstance(row, dict) or (hasattr(row, 'items') and hasattr(row, 'keys')):
+        for key, value in row.items():
+            size += sys.getsizeof(key) + approximate_size(value, depth+1)
+    elif isinstance(row, (list, tuple)):
+        for value in row:
+            size += approximate_size(value, depth+1)
+    return size
+
+class CacheEntry:
+    __slots__ = ('row', 'expires', 'size', 'hits')
+    def __init__(self, row, expires, size):
+        self.row = row
+        self.expires = expires
+        self.size = size
+        self.hits = 1
 
 class Cache:
     """
-    Used for managing cache rotation & retention, max len
+    Used for managing cache rotation & retention, max len, max bytes & ttl
+    eviction policy:
+        lru - least recently used entries are evicted first
+        lfu - least frequently used entries are evicted first, ties
+              are evicted least recently used first
+    entries older than ttl seconds are expired when accessed, all
+    operations are O(1)
+    indexes - optional columns of cached row dicts, indexed as
+    column: value: cache keys & maintained on insert, update & removal
     """
+    policies = {'lru', 'lfu'}
+    __slots__ = (
+        'parent', 'log', 'cache', 'max_len', 'max_bytes', 'ttl',
+        'policy', 'size_bytes', 'frequencies', 'min_hits', 'indexes',
+        'counters'
+    )
     def __init__(self, parent, **kw):
         self.parent = parent
-        self.cache = {}
         self.log = self.parent.log
-        self.timestamp_to_cache = {}
-        self.access_history = deque()
-        self.max_len = self.parent.max_cache_len
-    def check_max_len_and_clear(self):
-        if len(self.timestamp_to_cache) >= self.max_len:
-            while len(self.timestamp_to_cache) >= self.max_len:
-                cache_time = self.access_history.popleft()
-                if cache_time in self.timestamp_to_cache:
-                    _, cache_key = self.timestamp_to_cache[cache_time]
-                    del self.timestamp_to_cache[cache_time]
-                    if cache_key in self.cache and not self.cache[cache_key] == cache_time:
-                        continue
-                    del self.cache[cache_key]
-                    self.log.debug(f"# {self.parent} cach_key '{cache_key}' cleared due to cache length of {self.max_len} exceeded")
-    def update_timestamp(self, cached_key):
-        if cached_key in self:
-            old_time = self.cache[cached_key]
-            new_time = time.time()
-            self.timestamp_to_cache[new_time] = self.timestamp_to_cache[old_time]
-            del self.timestamp_to_cache[old_time]
-            self.cache[cached_key] = new_time
-            self.access_history.append(new_time)
+        # limits default to parent cache settings, unless provided
+        self.max_len = kw.get('max_len', self.parent.max_cache_len)
+        self.max_bytes = kw.get('max_bytes', self.parent.max_cache_bytes)
+        self.ttl = kw.get('ttl', self.parent.cache_ttl)
+        self.policy = kw.get('policy', self.parent.cache_policy)
+        if not self.policy in self.policies:
+            raise InvalidInputError(
+                f"cache_policy {self.policy} is invalid", f"use one of {self.policies}"
+            )
+        # cache_key: CacheEntry, in least recently used order
+        self.cache = OrderedDict()
+        self.size_bytes = 0
+        # lfu - hits: cache_keys with hits, in least recently used order
+        self.frequencies = {}
+        self.min_hits = 1
+        # column: value: cache_keys of rows with value
+        self.indexes = {column: {} for column in kw.get('indexes') or ()}
+        self.reset_stats()
+    def reset_stats(self):
+        """
+        resets hit, miss, eviction & invalidation counters
+        """
+        self.counters = {
+            'hits': 0, 
+            'misses': 0, 
+            'evictions': {'max_len': 0, 'max_bytes': 0, 'ttl': 0},
+            'invalidations': 0
+        }
+    def stats(self):
+        """
+        returns counters with current entries & approximate bytes, 
+        bytes are sized on demand when max_bytes is not set
+        """
+        return {
+            'hits': self.counters['hits'],
+            'misses': self.counters['misses'],
+            'evictions': dict(self.counters['evictions']),
+            'invalidations': self.counters['invalidations'],
+            'entries': len(self.cache),
+            'bytes': (
+                self.size_bytes if self.max_bytes is not None 
+                else sum(approximate_size(entry.row) for entry in self.cache.values())
+            )
+        }
+    def __evict_key(self):
+        if self.policy == 'lru':
+            return next(iter(self.cache))
+        if not self.min_hits in self.frequencies:
+            self.min_hits = min(self.frequencies)
+        return next(iter(self.frequencies[self.min_hits]))
+    def __remove(self, cache_key):
+        entry = self.cache.pop(cache_key)
+        self.size_bytes -= entry.size
+        if self.indexes:
+            self.__unindex(cache_key, entry.row)
+        if self.policy == 'lfu':
+            keys = self.frequencies[entry.hits]
+            del keys[cache_key]
+            if not keys:
+                del self.frequencies[entry.hits]
+        return entry
+    def __index(self, cache_key, row):
+        for column, index in self.indexes.items():
+            value = row.get(column)
+            if isinstance(value, Hashable):
+                index.setdefault(value, set()).add(cache_key)
+    def __unindex(self, cache_key, row):
+        for column, index in self.indexes.items():
+            value = row.get(column)
+            if not isinstance(value, Hashable) or not value in index:
+                continue
+            index[value].discard(cache_key)
+            if not index[value]:
+                del index[value]
+    def lookup(self, column, value):
+        """
+        returns set of cache keys of cached rows with column == value,
+        column must be indexed
+        """
+        return set(self.indexes[column].get(value, ()))
+    def update_row(self, cached_key, values):
+        """
+        updates cached row of cached_key in place with values, 
+        re-indexing changed indexed columns
+        """
+        entry = self.__entry(cached_key)
+        if entry is None:
+            return
+        self.counters['invalidations'] += 1
+        if self.indexes:
+            self.__unindex(cached_key, entry.row)
+        entry.row.update(values)
+        if self.indexes:
+            self.__index(cached_key, entry.row)
+    def __touch(self, cache_key, entry):
+        self.cache.move_to_end(cache_key)
+        if self.policy == 'lfu':
+            keys = self.frequencies[entry.hits]
+            del keys[cache_key]
+            if not keys:
+                del self.frequencies[entry.hits]
+                if self.min_hits == entry.hits:
+                    self.min_hits += 1
+            entry.hits += 1
+            self.frequencies.setdefault(entry.hits, OrderedDict())[cache_key] = None
+    def __entry(self, cache_key):
+        """
+        returns CacheEntry of cache_key or None if missing / expired
+        """
+        entry = self.cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= time.monotonic():
+            self.__remove(cache_key)
+            self.counters['evictions']['ttl'] += 1
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(f"# {self.parent} cach_key '{cache_key}' expired after cache ttl of {self.ttl}")
+            return None
+        return entry
+    def check_max_len_and_clear(self, size=0):
+        """
+        evicts entries until an entry of size bytes fits within
+        max_len & max_bytes
+        """
+        while self.cache and (
+            len(self.cache) >= self.max_len
+            or (self.max_bytes is not None and self.size_bytes + size > self.max_bytes)
+        ):
+            cache_key = self.__evict_key()
+            self.__remove(cache_key)
+            self.counters['evictions'][
+                'max_len' if len(self.cache) + 1 >= self.max_len else 'max_bytes'
+            ] += 1
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(f"# {self.parent} cach_key '{cache_key}' cleared due to cache length of {self.max_len} / size of {self.max_bytes} bytes exceeded")
     def __iter__(self):
         def cache_generator():
-            for cache_key, timestamp in self.cache.copy().items():
-                yield cache_key, self.timestamp_to_cache[timestamp][0]
+            for cache_key in list(self.cache):
+                entry = self.__entry(cache_key)
+                if entry is not None:
+                    yield cache_key, entry.row
         return cache_generator()
+    def get(self, cached_key, default=None):
+        """
+        returns cached row of cached_key or default, counted as a 
+        cache hit or miss
+        """
+        entry = self.__entry(cached_key)
+        if entry is None:
+            self.counters['misses'] += 1
+            return default
+        self.counters['hits'] += 1
+        self.__touch(cached_key, entry)
+        return entry.row
     def __getitem__(self, cached_key):
-        if cached_key in self:
-            cache_time = self.cache[cached_key]
-            if cache_time in self.timestamp_to_cache:
-                cache_row = self.timestamp_to_cache[cache_time][0]
-                self.update_timestamp(cached_key)
-                return cache_row
-        return None
+        entry = self.__entry(cached_key)
+        if entry is None:
+            return None
+        self.__touch(cached_key, entry)
+        return entry.row
     def __setitem__(self, cached_key, row):
-        cache_time = time.time()
-        if cached_key in self.cache:
-            old_cache_time = self.cache[cached_key]
-            del self.timestamp_to_cache[old_cache_time]
-        self.cache[cached_key] = cache_time
-        self.timestamp_to_cache[cache_time] = (row, cached_key)
-        self.access_history.append(cache_time)
-        self.check_max_len_and_clear()
+        size = approximate_size(row) if self.max_bytes is not None else 0
+        entry = self.cache.get(cached_key)
+        if entry is not None:
+            # existing entries keep their hits
+            self.__remove(cached_key)
+        if self.max_len < 1 or (self.max_bytes is not None and size > self.max_bytes):
+            self.log.debug(f"# {self.parent} cach_key '{cached_key}' of {size} bytes not cached, exceeds cache limits")
+            return
+        self.check_max_len_and_clear(size)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        new_entry = CacheEntry(row, expires, size)
+        if entry is not None:
+            new_entry.hits = entry.hits
+        self.cache[cached_key] = new_entry
+        self.size_bytes += size
+        if self.indexes:
+            self.__index(cached_key, row)
+        if self.policy == 'lfu':
+            self.frequencies.setdefault(new_entry.hits, OrderedDict())[cached_key] = None
+            self.min_hits = min(self.min_hits, new_entry.hits)
+    def clear(self):
+        """
+        removes all cached entries, counted as invalidations
+        """
+        self.counters['invalidations'] += len(self.cache)
+        self.cache.clear()
+        self.size_bytes = 0
+        self.frequencies.clear()
+        self.min_hits = 1
+        for index in self.indexes.values():
+            index.clear()
     def __delitem__(self, cached_key):
         if cached_key in self.cache:
-            cache_time = self.cache.pop(cached_key)
-            if cache_time in self.timestamp_to_cache:
-                del self.timestamp_to_cache[cache_time]
+            self.__remove(cached_key)
+            self.counters['invalidations'] += 1
     def __contains__(self, cached_key):
-        return cached_key in self.cache
\ No newline at end of file
+        return self.__entry(cached_key) is not None
+    def __len__(self):
+        return len(self.cache)
@@ -0,0 +1,143 @@
+from collections import deque
+from aiopyql.exceptions import InvalidInputError
+
+class CommitScheduler:
+    """
+    Decides when the writer lane commits pending writes
+    commit modes:
+        max_latency    - commits once the queue is empty or the oldest 
+                         pending write waited max_latency seconds
+        max_batch_size - commits once the queue is empty or max_batch 
+                         writes are pending
+        adaptive       - commits at max_batch or max_latency, & when the
+                         queue is empty waits up to one commit duration 
+                         for more writes, if writes arrive faster than 
+                         commits complete. The wait ends once a query
+                         is queued, shrinks when no writes arrive 
+                         during it & grows when they do
+    commit batch size & latency (first write received -> committed) 
+    metrics are kept for the last 1000 commits
+    """
+    modes = {'max_latency', 'max_batch_size', 'adaptive'}
+    # weight of the latest observation in moving averages
+    alpha = 0.2
+    def __init__(self, parent, mode='max_latency', max_batch=1000, max_latency=0.02):
+        self.parent = parent
+        self.log = parent.log
+        if not mode in self.modes:
+            raise InvalidInputError(
+                f"commit_mode {mode} is invalid", f"use one of {self.modes}"
+            )
+        self.mode = mode
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        # writes pending commit & time the first was received
+        self.pending = 0
+        self.pending_since = None
+        self.last_write = None
+        # moving averages, seconds
+        self.commit_duration = 0.0
+        self.arrival_interval = None
+        # fraction of commit duration waited, tuned by waited()
+        self.gain = 1.0
+        self.reset_stats()
+    def reset_stats(self):
+        """
+        resets commit batch size & latency metrics
+        """
+        self.commits = 0
+        self.writes = 0
+        self.batch_sizes = deque(maxlen=1000)
+        self.latencies = deque(maxlen=1000)
+    def window(self):
+        """
+        seconds to wait for more writes when the queue is empty, 
+        adaptive mode only
+        """
+        if not self.mode == 'adaptive' or self.arrival_interval is None:
+            return 0
+        if self.arrival_interval >= self.commit_duration:
+            # writes arrive slower than a commit, waiting only adds latency
+            return 0
+        return min(self.commit_duration * self.gain, self.max_latency)
+    def waited(self, arrived):
+        """
+        records whether writes arrived while waiting, i.e none arrive
+        when all writers are waiting on the commit
+        """
+        self.gain = min(1.0, self.gain + 0.25) if arrived else max(1 / 64, self.gain / 2)
+    def add_write(self, now):
+        """
+        records a write received by the processor, pending commit
+        """
+        if self.last_write is not None:
+            interval = now - self.last_write
+            self.arrival_interval = (
+                interval if self.arrival_interval is None
+                else self.alpha * interval + (1 - self.alpha) * self.arrival_interval
+            )
+        self.last_write = now
+        if self.pending == 0:
+            self.pending_since = now
+        self.pending += 1
+    def due(self, now):
+        """
+        True if pending writes should be committed before the next write
+        """
+        if self.pending == 0:
+            return False
+        if self.max_batch is not None and self.pending >= self.max_batch:
+            return True
+        if self.mode == 'max_batch_size':
+            return False
+        return now - self.pending_since > self.max_latency
+    def wait_time(self, now):
+        """
+        seconds to wait for more writes once the queue is empty before
+        committing, 0 commits now
+        """
+        if self.pending == 0 or self.due(now):
+            return 0
+        return max(0, self.pending_since + self.window() - now)
+    def committed(self, size, duration, now):
+        """
+        records a completed commit of size writes, which took duration
+        seconds to execute & commit
+        """
+        self.commit_duration = self.alpha * duration + (1 - self.alpha) * self.commit_duration
+        self.commits += 1
+        self.writes += size
+        self.batch_sizes.append(size)
+        if self.pending_since is not None:
+            self.latencies.append(now - self.pending_since)
+        self.pending = 0
+        self.pending_since = None
+    @staticmethod
+    def percentile(values, percent):
+        if not values:
+            return None
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+    def stats(self):
+        """
+        returns commit counts, batch size & latency in seconds of recent 
+        commits, as well as the current adaptive window
+        """
+        return {
+            'mode': self.mode,
+            'commits': self.commits,
+            'writes': self.writes,
+            'batch_size': {
+                'last': self.batch_sizes[-1] if self.batch_sizes else None,
+                'mean': sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else None,
+                'max': max(self.batch_sizes) if self.batch_sizes else None
+            },
+            'latency': {
+                'last': self.latencies[-1] if self.latencies else None,
+                'p50': self.percentile(self.latencies, 50),
+                'p99': self.percentile(self.latencies, 99),
+                'max': max(self.latencies) if self.latencies else None
+            },
+            'commit_duration': self.commit_duration,
+            'window': self.window()
+        }
@@ -1,8 +1,9 @@
 import logging 
-import uuid, time
+import uuid, time, re
+import os, json, zlib, base64
 import asyncio
 from typing import (
-    Optional
+    Optional, Callable
 )
 from collections import deque
 from concurrent.futures._base import CancelledError
@@ -10,7 +11,11 @@ from asyncio import InvalidStateError
 
 from aiopyql.utilities import TableColumn
 from aiopyql.cache import Cache
+from aiopyql.commit import CommitScheduler
+from aiopyql.lanes import LaneQueue, query_priority
 from aiopyql.table import Table
+from aiopyql.transaction import Transaction, current_transaction
+from aiopyql.exceptions import InvalidInputError, InvalidColumnType, TransactionError, QueryTimeoutError
 
 class Database:
     """
@@ -43,6 +48,19 @@ Mysql
         db_type: str = 'sqlite',
         cache_enabled: Optional[bool] = False,
         max_cache_len: Optional[int] = 125,
+        max_cache_bytes: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_policy: Optional[str] = 'lru',
+        max_queue_processors: Optional[int] = 1,
+        commit_mode: Optional[str] = 'max_latency',
+        max_commit_batch: Optional[int] = 1000,
+        max_commit_latency: Optional[float] = 0.02,
+        max_pending_writes: Optional[int] = 10000,
+        write_error_callback: Optional[Callable] = None,
+        max_queue_depth: Optional[int] = 10000,
+        queue_full: Optional[str] = 'wait',
+        query_timeout: Optional[float] = None,
+        decode_json_str: Optional[bool] = True,
         debug: Optional[bool] = False,
         log: Optional[logging.Logger] = None,
         loop: Optional[asyncio.AbstractEventLoop] = None,
@@ -54,6 +72,19 @@ Mysql
             db_type=db_type,
             cache_enabled=cache_enabled,
             max_cache_len=max_cache_len,
+            max_cache_bytes=max_cache_bytes,
+            cache_ttl=cache_ttl,
+            cache_policy=cache_policy,
+            max_queue_processors=max_queue_processors,
+            commit_mode=commit_mode,
+            max_commit_batch=max_commit_batch,
+            max_commit_latency=max_commit_latency,
+            max_pending_writes=max_pending_writes,
+            write_error_callback=write_error_callback,
+            max_queue_depth=max_queue_depth,
+            queue_full=queue_full,
+            query_timeout=query_timeout,
+            decode_json_str=decode_json_str,
             debug=debug,
             log=log,
             loop=loop,
@@ -67,6 +98,19 @@ Mysql
         db_type: str = 'sqlite',
         cache_enabled: Optional[bool] = False,
         max_cache_len: Optional[int] = 125,
+        max_cache_bytes: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_policy: Optional[str] = 'lru',
+        max_queue_processors: Optional[int] = 1,
+        commit_mode: Optional[str] = 'max_latency',
+        max_commit_batch: Optional[int] = 1000,
+        max_commit_latency: Optional[float] = 0.02,
+        max_pending_writes: Optional[int] = 10000,
+        write_error_callback: Optional[Callable] = None,
+        max_queue_depth: Optional[int] = 10000,
+        queue_full: Optional[str] = 'wait',
+        query_timeout: Optional[float] = None,
+        decode_json_str: Optional[bool] = True,
         debug: Optional[bool] = False,
         log: Optional[logging.Logger] = None,
         loop: Optional[asyncio.AbstractEventLoop] = None,
@@ -96,28 +140,68 @@ Mysql
         # cache
         self.cache_enabled = cache_enabled
         self.max_cache_len = max_cache_len
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_ttl = cache_ttl
+        self.cache_policy = cache_policy
         self.cache = None
+        self.cache_dependencies = {}
         if self.cache_enabled:
             self.enable_cache()
 
-        # query queue
-        self._query_queue = asyncio.Queue()
+        # JSON dumped dicts stored in str columns are decoded by checking
+        # each returned str value, False returns str values as stored
+        self.decode_json_str = decode_json_str
+
+        # single-flight reads - cache_key: [task, table writes at start, waiting callers]
+        self.in_flight = {}
+        # table: count of writes, used to detect reads overlapping writes
+        self.table_writes = {}
+
+        # async writes - tasks of writes not awaited by the caller, at
+        # most max_pending_writes, errors are sent to write_error_callback
+        self.pending_writes = set()
+        self.max_pending_writes = max_pending_writes
+        self.pending_write_slots = asyncio.Semaphore(max_pending_writes)
+        self.write_error_callback = write_error_callback
+
+        # query queue - writer lane, bounded with read, write & 
+        # maintenance priority lanes
+        self.max_queue_depth = max_queue_depth
+        self.queue_full = queue_full
+        # default seconds a caller waits for a query, None waits forever
+        self.query_timeout = query_timeout
+        self._query_queue = LaneQueue(max_queue_depth, queue_full)
         self.querries_to_commit = {}
+        # decides when the writer lane commits pending writes
+        self.commit_scheduler = CommitScheduler(
+            self, 
+            mode=commit_mode, 
+            max_batch=max_commit_batch, 
+            max_latency=max_commit_latency
+        )
 
         self.queue_process_tasks = []
-        self.queue_results = {"pending": {}, "finished": {}}
         self.MAX_QUEUE_PROCESS = 100
 
         self.queue_processing = set()
-        self.MAX_QUEUE_PROCESSORS = 1
-        for _ in range(self.MAX_QUEUE_PROCESSORS):
-            self.queue_process_tasks.append(self.loop.create_task(self.__process_queue()))
+        self.MAX_QUEUE_PROCESSORS = max(1, int(max_queue_processors))
+
+        # reader lane - a single processor serves both lanes, otherwise
+        # one processor is dedicated to writes & the rest share reads
+        self._read_queue = (
+            self._query_queue if self.MAX_QUEUE_PROCESSORS == 1 
+            else LaneQueue(max_queue_depth, queue_full)
+        )
+        self.cursors = []
+        self.start_queue_processors()
 
         self.liveness = self.loop.create_task(self.keep_alive())
     async def keep_alive(self):
         """
         periodic check for db connection live-ness 
         """
+        # liveness queries yield to reads & writes
+        query_priority.set('maintenance')
         try:
             if 'liveness' in self.tables:
                 await self.run('drop table liveness')
@@ -169,17 +253,33 @@ Mysql
                 # exiting
                 break
 
-    async def restart_queue_processor(self):
-        await asyncio.sleep(1)
-        self.queue_processing = set()
-        self.log.warning(f"restart_queue_processor called: current {self.queue_processing}")
-        self.setup_connection_and_cursor()
+    def start_queue_processors(self, lanes: Optional[list] = None):
+        """
+        creates a __process_queue task, each with its own connection,
+        for each lane - default: 1 writer & MAX_QUEUE_PROCESSORS - 1 readers
+        """
+        if lanes is None:
+            lanes = ['write'] + ['read'] * (self.MAX_QUEUE_PROCESSORS - 1)
+        for lane in lanes:
+            queue = self._query_queue if lane == 'write' else self._read_queue
+            self.queue_process_tasks.append(
+                self.loop.create_task(self.__process_queue(queue, lane=lane))
+            )
 
-        if len(self.queue_processing) < self.MAX_QUEUE_PROCESSORS:
-            for _ in range(self.MAX_QUEUE_PROCESSORS):
-                self.queue_process_tasks.append(self.loop.create_task(self.__process_queue()))
+    async def restart_queue_processor(self, lane: Optional[str] = None):
+        """
+        restarts the processor for lane, or all processors if lane is None
+        """
+        await asyncio.sleep(1)
+        self.log.warning(f"restart_queue_processor called: lane {lane} current {self.queue_processing}")
+        if lane is None:
+            self.queue_processing = set()
+            self.cursors = []
+            self.setup_connection_and_cursor()
+            self.start_queue_processors()
+            return
+        self.start_queue_processors([lane])
 
-            
 
     def setup_parameter_check(self, params):
         self.connect_params =  {'user', 'password', 'host', 'port'}
@@ -204,16 +304,22 @@ Mysql
 
         self.connect = connector.get_db_manager()
         self.cursor_manager = connector.get_cursor_manager(self)
-        self.cursor = None
 
         self.load_tables = connector.load_tables
         self.row_return_type = connector.row_return_type
         self.get_table_schema = connector.get_table_schema
         self.migrate_table = connector.migrate_table
 
+        self.param_placeholder = connector.get_param_placeholder
+        self.get_upsert_clause = connector.get_upsert_clause
         self.process_query_commit = connector.process_query_commit
         self.process_query_no_commit = connector.process_query_no_commit
+        self.stream_query = connector.stream_query
+        self.stream_connection = connector.stream_connection
         self.submit_commit_pool = connector.submit_commit_pool
+        self.start_transaction = connector.start_transaction
+        self.cancel_query = connector.cancel_query
+        self.prepare_connection = connector.prepare_connection
 
         def db_validate_where_input(tables, where):
             return connector.validate_where_input(self, tables, where)
@@ -221,15 +327,24 @@ Mysql
 
     async def close(self, liveness=True):
         """
-        stops running running process task
+        stops running running process task, pending async writes are
+        flushed first
         """
+        if liveness:
+            await self.flush()
         for task in self.queue_process_tasks:
             task.cancel()
-        try:
-            await self.cursor.asend(None)
-        except StopAsyncIteration:
-            pass
-        await self._query_queue.put(('EXITING', None))
+        for cursor in self.cursors:
+            try:
+                await cursor.asend(None)
+            except StopAsyncIteration:
+                pass
+            except Exception:
+                self.log.debug(f"cursor already closed during close()")
+        self.cursors = []
+        self._query_queue.put_control(('EXITING', None, None))
+        if not self._read_queue is self._query_queue:
+            self._read_queue.put_control(('EXITING', None, None))
         await asyncio.sleep(0.1)
         self.log.debug(f"{self.db_name} closed successfully")
         if liveness:
@@ -245,12 +360,129 @@ Mysql
         if self.cache == None:
             self.cache_enabled = True
             self.cache = Cache(self)
+            # table: cache keys of cached results which depend on table
+            self.cache_dependencies = {}
         else:
             self.log.warning("enable_cache called while cache exists, first disable & then enable")
     def disable_cache(self):
         if not self.cache == None:
             self.cache = None
+            self.cache_dependencies = {}
             self.cache_enabled = False
+    def cache_stats(self, reset: bool = False):
+        """
+        returns read cache hits, misses, evictions by reason, 
+        invalidations by writes, entries & bytes or None if cache 
+        is disabled, reset=True resets counters
+        """
+        if self.cache == None:
+            return None
+        stats = self.cache.stats()
+        if reset:
+            self.cache.reset_stats()
+        return stats
+    def commit_stats(self, reset: bool = False):
+        """
+        returns commit mode, count, batch size & latency of recent 
+        commits of the writer lane, reset=True resets metrics
+        """
+        stats = self.commit_scheduler.stats()
+        if reset:
+            self.commit_scheduler.reset_stats()
+        return stats
+    def queue_stats(self, reset: bool = False):
+        """
+        returns depth, max_depth, peak depth, puts which waited for space 
+        & puts rejected (queue_full='raise') per priority lane, summed 
+        over the writer & reader queues, reset=True resets counters
+        """
+        queues = [self._query_queue]
+        if not self._read_queue is self._query_queue:
+            queues.append(self._read_queue)
+        stats = {}
+        for queue in queues:
+            for priority, lane_stats in queue.stats().items():
+                if not priority in stats:
+                    stats[priority] = lane_stats
+                    continue
+                for counter in ['depth', 'waited', 'rejected']:
+                    stats[priority][counter] += lane_stats[counter]
+                stats[priority]['peak'] = max(stats[priority]['peak'], lane_stats['peak'])
+            if reset:
+                queue.reset_stats()
+        return stats
+    snapshot_header = b'AIOPYQL-CACHE-2\n'
+    @staticmethod
+    def _snapshot_encode(value):
+        """
+        JSON encodes bytes values of cached rows, as base64
+        """
+        if isinstance(value, (bytes, bytearray)):
+            return {'__bytes__': base64.b64encode(value).decode()}
+        raise TypeError(f"value of type {type(value).__name__} cannot be saved in a cache snapshot")
+    @staticmethod
+    def _snapshot_decode(obj):
+        if len(obj) == 1 and '__bytes__' in obj:
+            return base64.b64decode(obj['__bytes__'])
+        return obj
+    async def save_cache_snapshot(self, path: str, data_version=None):
+        """
+        Usage: saves cached rows of cache enabled tables to path as 
+        compressed JSON, with each table schema fingerprint & data 
+        marker, returns number of rows saved per table
+            await db.save_cache_snapshot('cache.snapshot', data_version='release-42')
+        """
+        tables = {}
+        for name, table in self.tables.items():
+            if not table.cache_enabled:
+                continue
+            tables[name] = {
+                'schema': table.schema_fingerprint(),
+                'data_marker': await table.data_marker(),
+                'rows': list(table.cache)
+            }
+        snapshot = {'data_version': data_version, 'created': time.time(), 'tables': tables}
+        data = zlib.compress(json.dumps(snapshot, default=self._snapshot_encode).encode())
+        # written to a temporary file first, so a snapshot is never partial
+        with open(f"{path}.tmp", 'wb') as snapshot_file:
+            snapshot_file.write(self.snapshot_header + data)
+        os.replace(f"{path}.tmp", path)
+        return {name: len(table['rows']) for name, table in tables.items()}
+    async def load_cache_snapshot(self, path: str, data_version=None):
+        """
+        Usage: restores cached rows saved via save_cache_snapshot, 
+        returns number of rows restored per table. Snapshots with a 
+        different data_version are ignored, tables are skipped if their 
+        schema or data marker (row count, max primary key) changed
+            await db.load_cache_snapshot('cache.snapshot', data_version='release-42')
+        in-place updates do not change the data marker, a data_version 
+        bumped by the application is needed to discard updated rows
+        """
+        with open(path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        if not data.startswith(self.snapshot_header):
+            raise InvalidInputError(path, "file is not an aiopyql cache snapshot")
+        snapshot = json.loads(
+            zlib.decompress(data[len(self.snapshot_header):]), object_hook=self._snapshot_decode
+        )
+        if not snapshot['data_version'] == data_version:
+            self.log.warning(f"cache snapshot {path} data_version {snapshot['data_version']} does not match {data_version}, not loaded")
+            return {}
+        restored = {}
+        for name, saved in snapshot['tables'].items():
+            table = self.tables.get(name)
+            if table is None or not table.cache_enabled:
+                continue
+            if not saved['schema'] == table.schema_fingerprint():
+                self.log.warning(f"cache snapshot of table {name} skipped - schema changed")
+                continue
+            if not tuple(saved['data_marker']) == await table.data_marker():
+                self.log.warning(f"cache snapshot of table {name} skipped - rows changed")
+                continue
+            for key, row in saved['rows']:
+                table.cache[key] = row
+            restored[name] = len(saved['rows'])
+        return restored
     def _run_async_tasks(self, *args):
         if not self.loop == None:
             raise NotImplementedError(f"_run_async_tasks method not allowed with an existing event loop {self.loop}")
@@ -275,47 +507,84 @@ Mysql
             self.log.setLevel(level)
         else:
             self.log = logger
-    def cache_check(self, query):
+    table_reference = re.compile(
+        r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?[`"]?(\w+)',
+        re.IGNORECASE
+    )
+    def query_tables(self, query):
+        """
+        returns set of table names referenced by query, used when 
+        tables are not provided by the caller
+        """
+        return set(self.table_reference.findall(query))
+    def add_cache_dependencies(self, cache_key, tables):
+        """
+        records cache_key in the table: cache keys index of each table
+        the cached result depends on
         """
-        checks 
+        for table in tables:
+            cache_keys = self.cache_dependencies.setdefault(table, set())
+            cache_keys.add(cache_key)
+            if len(cache_keys) > 2 * self.cache.max_len:
+                # drop keys evicted from the cache
+                self.cache_dependencies[table] = {
+                    key for key in cache_keys if key in self.cache.cache
+                }
+    def cache_check(self, query, tables=None):
         """
-        if 'SELECT' in query:
+        invalidates cached results which depend on the tables 
+        written by a non-select query
+        """
+        if self.is_read_query(query):
+            return
+        if tables is None:
+            tables = self.query_tables(query)
+        for table in tables:
+            # in-flight reads started before this write are not shared or cached
+            self.table_writes[table] = self.table_writes.get(table, 0) + 1
+            if not self.cache_enabled:
+                continue
+            for cache_key in self.cache_dependencies.pop(table, ()):
+                if cache_key in self.cache.cache:
+                    self.log.debug(f"## db cache deleted - query {cache_key}")
+                    del self.cache[cache_key]
+    @staticmethod
+    def set_query_result(query_future, result):
+        """
+        resolves the future of a queued query with result, exceptions 
+        are raised to the caller, futures of callers which are no 
+        longer waiting are ignored
+        """
+        if query_future.done():
             return
-        # non - select
-
-        cache_to_clear = set()
-        table_in_query = None
-        for table in self.tables:
-            if (f"UPDATE {table}" in query or 
-                f"INTO {table}" in query or
-                f"FROM {table}" in query
-                ):
-                table_in_query = table
-        for cache, _ in self.cache:
-            if f"JOIN {table_in_query}" in cache or f'FROM {table_in_query}' in cache:
-                cache_to_clear.add(cache)
-        for cache in cache_to_clear:
-            self.log.debug(f"## db cache deleted - query {cache}")
-            del self.cache[cache]
+        if isinstance(result, Exception):
+            query_future.set_exception(result)
+        else:
+            query_future.set_result(result)
+
     async def __commit_querries_run_query(self, query):
         """
-        a coro which unpacks query id, query, and pending coroutine, 
-        executes and marks query complete by updating 
-        self.queue_results[query_id]
+        a coro which unpacks query future, query, and pending coroutine, 
+        executes and returns query future & result, used to mark query
+        complete once the commit finishes
         """
+        query_future, q, q_coro = query 
+        if query_future.done():
+            # caller went away before the query started, i.e timeout
+            q_coro.close()
+            return query_future, []
         try:
-            query_id, q, q_coro = query 
             self.log.debug(f"{self.db_name} - execute: {q}")
             await q_coro
-            await self.queue_results[query_id].put([])
+            return query_future, []
         except Exception as e:
             #self.log.exception(f"error running query: {query}")
-            results = e
-            await self.queue_results[query_id].put(results)
+            return query_future, e
 
     async def commit_querries(self, connection, querries):
         self.log.debug(f"commit_querries started for {querries}")
         start = time.time()
+        batch_size = len(querries)
         run_querries = []
 
         try:
@@ -330,51 +599,116 @@ Mysql
             self.log.exception(f"exception while building commit query pool")
 
         if not self.type == 'sqlite':
-            for run_q in run_querries:
-                await run_q
+            results = [await run_q for run_q in run_querries]
         else:
-            await asyncio.gather(*run_querries, return_exceptions=True)
-        if not self.type == 'postgres':
-            await connection.commit()
-        self.log.debug(f"commit_querries of {len(querries)} completed in {time.time() - start} seconds")
+            results = await asyncio.gather(*run_querries)
+        try:
+            if not self.type == 'postgres':
+                await connection.commit()
+        except Exception as e:
+            self.log.exception(f"error commiting querries")
+            results = [(query_future, e) for query_future, _ in results]
+
+        committed = time.time()
+        self.commit_scheduler.committed(batch_size, committed - start, committed)
 
-    async def __process_queue(self, commit=True):
+        # results are only returned once committed, so a read on another
+        # processor connection will see the changes 
+        for query_future, result in results:
+            self.set_query_result(query_future, result)
+        self.log.debug(f"commit_querries of {batch_size} completed in {committed - start} seconds")
+
+    # leading whitespace, comments & parentheses skipped to reach the 
+    # first keyword of a statement
+    statement_keyword = re.compile(
+        r'(?:\s+|--[^\n]*|/\*.*?\*/|\()*(\w+)', re.DOTALL
+    )
+    read_keywords = {'SELECT', 'SHOW', 'EXPLAIN', 'DESCRIBE', 'DESC', 'VALUES'}
+    write_keywords = {'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'MERGE'}
+    @classmethod
+    def is_read_query(cls, query):
+        """
+        True if query does not require a commit & may use the reader lane,
+        decided by the leading keyword of query, not by its table or 
+        column names. WITH is a read only when its main statement is a 
+        SELECT, PRAGMA only when no value is assigned
+        """
+        match = cls.statement_keyword.match(query)
+        if match is None:
+            return False
+        keyword = match.group(1).upper()
+        if keyword == 'PRAGMA':
+            return not '=' in query
+        if keyword == 'WITH':
+            return cls.__with_statement_keyword(query[match.end():]) == 'SELECT'
+        return keyword in cls.read_keywords
+    @classmethod
+    def __with_statement_keyword(cls, query):
+        """
+        returns the first keyword outside of parentheses & quotes, 
+        following the common table expressions of a WITH statement
+        """
+        depth, quote = 0, None
+        for word in re.finditer(r"'|\"|`|\(|\)|\w+", query):
+            token = word.group(0)
+            if quote is not None:
+                if token == quote:
+                    quote = None
+                continue
+            if token in {"'", '"', '`'}:
+                quote = token
+            elif token == '(':
+                depth += 1
+            elif token == ')':
+                depth -= 1
+            elif depth == 0:
+                keyword = token.upper()
+                if keyword == 'SELECT' or keyword in cls.write_keywords:
+                    return keyword
+        return None
+
+    async def __process_queue(self, queue, lane='write', commit=True):
         try:
             last_exception = None
-            self.cursor = self.cursor_manager(commit=commit)
-            async for conn in self.cursor:
+            cursor = self.cursor_manager(commit=commit)
+            self.cursors.append(cursor)
+            async for conn in cursor:
                 self.log.debug(f"__process_queue conn: {conn}")
                 if self.pre_query:
                     await conn.execute(self.pre_query)
+                await self.prepare_connection(self, conn, lane)
                 conn_id = str(uuid.uuid1())
                 self.queue_processing.add(conn_id)
                 self.querries_to_commit[conn_id] = deque()
-                last_commit = time.time()
                 queue_empty = True
                 try:
                     while True:
                         try:
                             if queue_empty:
                                 self.log.debug("queue_empty waiting for new query")
-                                query_id, query = await self._query_queue.get()
-                                self.log.debug(f"received new query: {query}")
+                                query_future, query, values = await queue.get()
+                                self.log.debug(f"{lane} lane received new query: {query}")
                                 queue_empty = False
                             else:
-                                query_id, query = self._query_queue.get_nowait()
-                            if query_id == 'EXITING':
+                                # let callers queue new queries, so a read 
+                                # arriving mid burst is served next via its lane
+                                await asyncio.sleep(0)
+                                query_future, query, values = queue.get_nowait()
+                            if query_future == 'EXITING':
                                 self.log.debug(f"__process_queue received exiting signal")
                                 break
 
-                            query_commit = not (
-                                'SELECT' in query
-                                or 'select' in query
-                                or 'show ' in query
-                                )
+                            query_commit = not self.is_read_query(query)
 
                             query_start = time.time()
                         except asyncio.queues.QueueEmpty:
+                            # group commit - may wait briefly for more writes,
+                            # any query queued meanwhile is served immediately
+                            wait = self.commit_scheduler.wait_time(time.time())
+                            if wait > 0:
+                                self.commit_scheduler.waited(await queue.wait(wait))
+                                continue
                             await self.submit_commit_pool(self, conn, conn_id)
-                            last_commit = time.time()
                             queue_empty = True
                             continue       
                         except Exception as e:
@@ -383,21 +717,35 @@ Mysql
                             last_exception = e
                             break
 
-                        if not query_commit or time.time() - last_commit > 0.02:
+                        if query_future.done():
+                            # caller went away before the query started, i.e timeout
+                            self.log.debug(f"{lane} lane dropped query of cancelled caller: {query}")
+                            continue
+
+                        if isinstance(values, Transaction):
+                            # pending writes are committed before the transaction starts
+                            await self.submit_commit_pool(self, conn, conn_id)
+                            await self.__process_transaction(conn, query_future, values)
+                            continue
+
+                        if not query_commit or self.commit_scheduler.due(query_start):
                             await self.submit_commit_pool(self, conn, conn_id)
-                            last_commit = time.time()
                         results = []
                         try:
                             #for q in query:
                             if not query_commit:
-                                results = await self.process_query_no_commit(self, conn, query_id, query)
+                                results = await self.__run_query(
+                                    conn, query_future, 
+                                    self.process_query_no_commit(self, conn, query_future, query, values)
+                                )
                             else:
-                                self.process_query_commit(self, conn, conn_id, query_id, query)
+                                self.process_query_commit(self, conn, conn_id, query_future, query, values)
+                                self.commit_scheduler.add_write(query_start)
                         except Exception as e:
                             self.log.exception(f"error running query: {query}")
                             results = e
                         if not query_commit:
-                            await self.queue_results[query_id].put(results)
+                            self.set_query_result(query_future, results)
                         if 'Broken pipe' in f"{results}":
                             last_exception = results
                             raise last_exception
@@ -406,6 +754,7 @@ Mysql
                         self.log.exception(f"error in __process_queue, closing db connection")
                 # process last queued
                 await self.submit_commit_pool(self, conn, conn_id)
+                self.queue_processing.discard(conn_id)
                 self.log.debug(f"closing cursor connecting")
             self.log.debug(f"closed cursor connection")                             
         except Exception as e:
@@ -413,60 +762,336 @@ Mysql
                 self.log.exception(f"error during __process_queue")
                 if 'Broken pipe' in repr(e):
                     last_exception = e
+        if cursor in self.cursors:
+            self.cursors.remove(cursor)
 
-        # un-locks processing so new processing tasks can start
-        self.queue_processing  = set()
-        self.log.debug(f"completed processing items in queue - {last_exception}")
+        self.log.debug(f"completed processing items in {lane} queue - {last_exception}")
         if not last_exception in {InvalidStateError, CancelledError}:
-            self.log.debug(f"completed processing items in queue - restarting")
-            await self.restart_queue_processor()
+            self.log.debug(f"completed processing items in {lane} queue - restarting")
+            await self.restart_queue_processor(lane)
         return "completed processing items in queue"
 
-    async def execute(self, query, commit=False):
-        self.log.debug(f"execute - {query}")
-        query_id = str(uuid.uuid1())
-        self.queue_results[query_id] = asyncio.Queue(1)
+    async def __run_query(self, conn, query_future, query_coro):
+        """
+        runs query_coro on conn, the statement is cancelled in the driver
+        if the caller stops waiting on query_future, i.e timeout
+        """
+        query_task = self.loop.create_task(query_coro)
+        def caller_done(future):
+            if future.cancelled() and not query_task.done():
+                self.loop.create_task(self.__cancel_query(conn, query_task))
+        query_future.add_done_callback(caller_done)
+        try:
+            await asyncio.wait({query_task})
+        except asyncio.CancelledError:
+            query_task.cancel()
+            raise
+        finally:
+            query_future.remove_done_callback(caller_done)
+        if query_future.cancelled():
+            self.log.debug(f"query cancelled by caller, result ignored")
+            return []
+        return query_task.result()
+    async def __cancel_query(self, conn, query_task):
+        try:
+            await self.cancel_query(self, conn, query_task)
+        except Exception:
+            self.log.exception(f"error cancelling query")
 
-        await self._query_queue.put((query_id, query))
+    async def __run_transaction_query(self, conn, transaction, query_future, query, values):
+        """
+        runs a statement of transaction on conn, writes are executed
+        immediately & committed with the transaction
+        """
+        if self.is_read_query(query):
+            return await self.__run_query(
+                conn, query_future, 
+                self.process_query_no_commit(self, conn, query_future, query, values)
+            )
+        self.process_query_commit(self, conn, transaction.id, query_future, query, values)
+        _, _, query_coro = self.querries_to_commit[transaction.id].popleft()
+        await query_coro
+        return []
+
+    async def __process_transaction(self, conn, ready, transaction):
+        """
+        serves statements of transaction on conn until it is committed
+        or rolled back, the processor lane is held meanwhile
+        """
+        self.log.debug(f"{transaction} started")
+        query_future = ready
+        self.querries_to_commit[transaction.id] = deque()
         try:
-            result = await self.queue_results[query_id].get()
-        except Exception as e:
-            self.log.exception(f"error while executing query {query}")
-            result = e
-        self.log.debug(f"completed query: {query_id}")
-        del self.queue_results[query_id]
-        if isinstance(result, Exception):
-            raise result
-        return result
+            connection_transaction = await self.start_transaction(self, conn)
+            self.set_query_result(ready, [])
+            while True:
+                query_future, query, values = await transaction.queue.get()
+                if query in {'COMMIT', 'ROLLBACK'}:
+                    break
+                if query_future.done():
+                    continue
+                try:
+                    result = await self.__run_transaction_query(
+                        conn, transaction, query_future, query, values
+                    )
+                except Exception as e:
+                    self.log.debug(f"{transaction} error running query: {query} - {repr(e)}")
+                    result = e
+                self.set_query_result(query_future, result)
+            try:
+                if query == 'COMMIT':
+                    await connection_transaction.commit()
+                else:
+                    await connection_transaction.rollback()
+                result = []
+            except Exception as e:
+                self.log.exception(f"{transaction} error during {query}")
+                result = e
+            self.set_query_result(query_future, result)
+            self.log.debug(f"{transaction} completed - {query}")
+        except BaseException as e:
+            self.set_query_result(query_future, e if isinstance(e, Exception) else TransactionError(
+                transaction, f"transaction processor stopped - {repr(e)}"
+            ))
+            raise
+        finally:
+            # statements queued after the connection is released fail
+            transaction.closed = True
+            del self.querries_to_commit[transaction.id]
+            while not transaction.queue.empty():
+                query_future, query, _ = transaction.queue.get_nowait()
+                self.set_query_result(query_future, TransactionError(
+                    transaction, f"transaction connection closed before {query}"
+                ))
+
+    async def submit_write(self, write, details=None):
+        """
+        runs write, a coroutine, without waiting for its result, waits 
+        only while max_pending_writes writes are pending. Errors are 
+        sent to write_error_callback(error, details) or logged
+        """
+        await self.pending_write_slots.acquire()
+        task = self.loop.create_task(write)
+        self.pending_writes.add(task)
+        task.add_done_callback(lambda task: self.__write_done(task, details))
+    def __write_done(self, task, details):
+        self.pending_writes.discard(task)
+        self.pending_write_slots.release()
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        if self.write_error_callback is None:
+            self.log.error(f"error during async write {details} - {repr(error)}")
+            return
+        try:
+            result = self.write_error_callback(error, details)
+            if asyncio.iscoroutine(result):
+                self.loop.create_task(result)
+        except Exception:
+            self.log.exception(f"error in write_error_callback")
+    async def flush(self):
+        """
+        waits until all pending async writes are committed
+        """
+        while self.pending_writes:
+            await asyncio.wait(set(self.pending_writes))
+    def transaction(self):
+        """
+        Usage: statements issued within the context, on any table, run
+        on one connection & are committed once, or rolled back if an 
+        exception is raised
+            async with db.transaction():
+                await db.tables['orders'].insert_many(orders)
+                await db.tables['stock'].update(qty=0, where={'item': 'a'})
+        """
+        return Transaction(self)
+    def active_transaction(self):
+        """
+        returns the transaction of the running task or None
+        """
+        transaction = current_transaction.get()
+        if transaction is None or not transaction.database is self or not transaction.active:
+            return None
+        return transaction
+    async def invalidate_tables(self, tables):
+        """
+        invalidates cached results depending on tables & cached rows
+        of tables, used once a transaction commits or rolls back
+        """
+        tables = list(tables)
+        if not tables:
+            return
+        self.cache_check('TRANSACTION', tables)
+        for name in tables:
+            if name in self.tables:
+                await self.tables[name].invalidate_cache()
+
+    async def with_timeout(self, awaitable, timeout, query):
+        """
+        awaits awaitable, raising QueryTimeoutError after timeout seconds,
+        awaitable is cancelled - cancelling its queued or running queries
+        """
+        if timeout is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, timeout)
+        except QueryTimeoutError:
+            raise
+        except asyncio.TimeoutError:
+            raise QueryTimeoutError(query, f"query did not complete within timeout of {timeout} seconds")
+
+    async def execute(self, query, commit=False, *, values=None, timeout: Optional[float] = None):
+        """
+        queues query for a processor & returns its result, callers wait 
+        at most timeout seconds, default query_timeout
+        """
+        timeout = timeout if timeout is not None else self.query_timeout
+        if timeout is not None:
+            return await self.with_timeout(self.__execute(query, values), timeout, query)
+        return await self.__execute(query, values)
+    async def __execute(self, query, values):
+        self.log.debug(f"execute - {query} - values: {values}")
+        transaction = self.active_transaction()
+        if transaction is not None:
+            return await transaction.execute(query, values)
+        query_future = self.loop.create_future()
+
+        read = self.is_read_query(query)
+        queue = self._read_queue if read else self._query_queue
+        priority = query_priority.get() or ('read' if read else 'write')
+        await queue.put((query_future, query, values), priority)
+        return await query_future
             
-    async def run(self, query):
+    async def run(self, query, *, values=None, tables=None, timeout: Optional[float] = None):
         """
-        Run query with commit
+        Run query with commit, values are bound to the query 
+        placeholders created via param_placeholder. Cached results 
+        depending on tables written by query are invalidated, tables 
+        are parsed from query if not provided, timeout defaults to 
+        query_timeout
         """
-        if self.cache_enabled:
-            self.cache_check(query)
-        result = await self.execute(query, commit=True)
-        if self.cache_enabled:
-            self.cache_check(query)
+        transaction = self.active_transaction()
+        # table_writes of table writes are always counted, used by table
+        # caches to detect reads overlapping writes
+        check = self.cache_enabled or self.in_flight or transaction is not None or tables is not None
+        if check:
+            if tables is None and not self.is_read_query(query):
+                tables = self.query_tables(query)
+            self.cache_check(query, tables)
+            if transaction is not None and tables:
+                transaction.tables.update(tables)
+        result = await self.execute(query, commit=True, values=values, timeout=timeout)
+        if check:
+            self.cache_check(query, tables)
         return result
 
-    async def get(self, query, commit=False):
+    async def get_iter(self, query, *, values=None, batch_size=1000, timeout: Optional[float] = None):
+        """
+        async generator which yields lists of at most batch_size rows,
+        rows are read from a server side / streaming cursor & are not
+        cached. Streams use a dedicated connection, so queue processors
+        remain free for queries made while iterating. timeout - seconds
+        to wait for each batch, default query_timeout
+        """
+        timeout = timeout if timeout is not None else self.query_timeout
+        stream_connection = (
+            self.stream_connection(self) if self.active_transaction() is None else None
+        )
+        if stream_connection is None:
+            # within a transaction or for in-memory sqlite, rows are 
+            # read at once via the queue processor
+            rows = await self.execute(query, values=values, timeout=timeout)
+            for start in range(0, len(rows), batch_size):
+                yield rows[start:start + batch_size]
+            return
+        async with stream_connection as conn:
+            batches = self.stream_query(self, conn, query, values, batch_size)
+            try:
+                while True:
+                    try:
+                        rows = await self.with_timeout(batches.__anext__(), timeout, query)
+                    except StopAsyncIteration:
+                        break
+                    yield rows
+            finally:
+                await batches.aclose()
+
+    async def get(self, query, commit=False, *, values=None, tables=None, timeout: Optional[float] = None):
         """
         Run query with optional commit. Typically used for select query. 
+        values are bound to the query placeholders, cached results are
+        keyed on (query, values) & invalidated by writes to tables, 
+        tables are parsed from query if not provided, timeout defaults 
+        to query_timeout
         Default:
             commit=False
         """
-        if self.cache_enabled:
+        cache_key = (query, tuple(values) if values else ())
+        if self.cache_enabled or self.in_flight:
             self.cache_check(query)
-            if query in self.cache:
-                self.log.debug(f"## db cache used - query {query}")
-                result = self.cache[query]
-                if not result == None and len(result) > 0:
-                    return result
-        result = await self.execute(query, commit=False)
+        transaction = self.active_transaction()
+        if transaction is not None:
+            # reads within a transaction see its uncommitted writes, 
+            # so are neither shared nor cached
+            if not self.is_read_query(query):
+                transaction.tables.update(tables if tables is not None else self.query_tables(query))
+            return await self.execute(query, values=values, timeout=timeout)
         if self.cache_enabled:
-            self.log.debug(f"## db cache added - query {query}")
-            self.cache[query] = result
+            # empty results are cached too, cached results are 
+            # invalidated by writes to the tables they depend on
+            result = self.cache.get(cache_key)
+            if not result == None:
+                self.log.debug(f"## db cache used - query {cache_key}")
+                return result
+        if not self.is_read_query(query):
+            return await self.execute(query, values=values, timeout=timeout)
+
+        # single-flight - identical concurrent reads share one query,
+        # unless a table the read depends on was written since it started
+        tables = tables if tables is not None else self.query_tables(query)
+        writes = tuple(self.table_writes.get(table, 0) for table in tables)
+        flight = self.in_flight.get(cache_key)
+        if flight is None or not flight[1] == writes:
+            # task, table writes at start, waiting callers
+            flight = [
+                self.loop.create_task(self.__get_flight(cache_key, query, values, tables, writes)),
+                writes,
+                0
+            ]
+            self.in_flight[cache_key] = flight
+        else:
+            self.log.debug(f"## db in-flight read shared - query {cache_key}")
+        flight[2] += 1
+        try:
+            # callers may be cancelled without cancelling the shared read
+            return await self.with_timeout(
+                asyncio.shield(flight[0]), 
+                timeout if timeout is not None else self.query_timeout,
+                query
+            )
+        finally:
+            flight[2] -= 1
+            if flight[2] == 0 and not flight[0].done():
+                # no caller is waiting, the read is cancelled
+                flight[0].cancel()
+    async def __get_flight(self, cache_key, query, values, tables, writes):
+        """
+        runs a shared read, caching the result once if no table it 
+        depends on was written while in flight
+        """
+        try:
+            result = await self.execute(query, values=values)
+        finally:
+            flight = self.in_flight.get(cache_key)
+            if flight is not None and flight[0] is asyncio.current_task():
+                del self.in_flight[cache_key]
+        # results without table dependencies cannot be invalidated
+        if self.cache_enabled and tables and writes == tuple(
+            self.table_writes.get(table, 0) for table in tables
+        ):
+            self.log.debug(f"## db cache added - query {cache_key}")
+            self.cache[cache_key] = result
+            self.add_cache_dependencies(cache_key, tables)
         return result
     async def remove_table(
         self,
@@ -480,8 +1105,17 @@ Mysql
                 self.log.exception(f"error removing table {name} from database")
         if name in self.tables:
             del self.tables[name]
+            self.clear_compiled_queries()
             self.log.warning(f"table {name} removed")
 
+    def clear_compiled_queries(self):
+        """
+        compiled queries may reference the columns of joined tables, 
+        so all are cleared when any table schema changes
+        """
+        for table in self.tables.values():
+            table.clear_compiled_queries()
+
     async def create_table(
         self, 
         name: str, 
@@ -490,6 +1124,15 @@ Mysql
         foreign_keys: dict = None,
         cache_enabled: Optional[bool] = False,
         max_cache_len: Optional[int] = 125,
+        max_cache_bytes: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_policy: Optional[str] = 'lru',
+        cache_indexes: Optional[list] = None,
+        resident: Optional[bool] = False,
+        max_negative_cache_len: Optional[int] = 1000,
+        negative_cache_ttl: Optional[float] = 60,
+        lookup_batch_window: Optional[float] = None,
+        write_mode: Optional[str] = 'sync',
         **kw
     ):
         """
@@ -502,14 +1145,15 @@ Mysql
                     ('trans', str, None),
                     ('symbol', str, None),
                     ('qty', float, None),
-                    ('price', str, None)
+                    ('price', str, None),
+                    ('details', dict, None) # JSON
                     ], 
                 'order_num', # Primary Key
                 foreign_keys={'trans': {'table': 'transactions', 'ref': 'txId'}} 
             )
         """
 
-        str_to_type = {'str': str, 'int': int, 'bytes': bytes, 'float': float, 'bool': bool}
+        str_to_type = {'str': str, 'int': int, 'bytes': bytes, 'float': float, 'bool': bool, 'dict': dict}
         #Convert tuple columns -> named_tuples
         cols = []
         for c in columns:
@@ -539,7 +1183,16 @@ Mysql
                 prim_key,
                 foreign_keys=foreign_keys,
                 cache_enabled=cache_enabled,
-                max_cache_len=max_cache_len
+                max_cache_len=max_cache_len,
+                max_cache_bytes=max_cache_bytes,
+                cache_ttl=cache_ttl,
+                cache_policy=cache_policy,
+                cache_indexes=cache_indexes,
+                resident=resident,
+                max_negative_cache_len=max_negative_cache_len,
+                negative_cache_ttl=negative_cache_ttl,
+                lookup_batch_window=lookup_batch_window,
+                write_mode=write_mode
             )
             
             # check for existing table & detect schema changes
@@ -565,6 +1218,8 @@ Mysql
             result = await new_table.create_schema()
             self.log.debug(f"create_table result: {result}")
 
+        except (InvalidInputError, InvalidColumnType):
+            raise
         except Exception as e:
             if 'exists' in f"{repr(e)}":
                 self.log.warning(f"detected already existing table {name}")
@@ -572,9 +1227,11 @@ Mysql
                 self.log.exception(f"error during create_table - {repr(e)}")
         
         self.tables[name] = new_table
+        self.clear_compiled_queries()
+        if resident:
+            await new_table.load_resident()
         return f"table {name} created"
 
 #   TOODOO:
 # - Add support for creating column indexes per tables
 # - Determine if views are needed and add support
-# - Support for transactions?
\ No newline at end of file
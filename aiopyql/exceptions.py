@@ -7,4 +7,16 @@ class InvalidInputError(Error):
 class InvalidColumnType(Error):
     def __init__(self, invalid_type, message):
         self.invalid_type = invalid_type
-        self.message = message
\ No newline at end of file
+        self.message = message
+class TransactionError(Error):
+    def __init__(self, transaction, message):
+        self.transaction = transaction
+        self.message = message
+class QueueFullError(Error):
+    def __init__(self, priority, message):
+        self.priority = priority
+        self.message = message
+class QueryTimeoutError(Error, TimeoutError):
+    def __init__(self, query, message):
+        self.query = query
+        self.message = message
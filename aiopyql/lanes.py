@@ -0,0 +1,123 @@
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+from aiopyql.exceptions import QueueFullError, InvalidInputError
+
+# priority of queries submitted by the running task, None - read or 
+# write priority based on the query, i.e keep_alive uses maintenance
+query_priority = ContextVar('aiopyql_query_priority', default=None)
+
+class LaneQueue:
+    """
+    Bounded query queue with a lane per priority, get returns items of
+    the highest priority non empty lane:
+        read        - selects
+        write       - inserts, updates, deletes & transactions
+        maintenance - i.e keep_alive liveness checks
+    a lower priority lane passed over max_skips times in a row is served
+    next, so a busy lane cannot starve the others. Each lane holds at 
+    most max_depth items, when full put waits (queue_full='wait') or 
+    raises QueueFullError (queue_full='raise')
+    """
+    priorities = ('read', 'write', 'maintenance')
+    policies = {'wait', 'raise'}
+    def __init__(self, max_depth=None, queue_full='wait', max_skips=16):
+        if not queue_full in self.policies:
+            raise InvalidInputError(
+                f"queue_full {queue_full} is invalid", f"use one of {self.policies}"
+            )
+        self.max_depth = max_depth
+        self.queue_full = queue_full
+        self.max_skips = max_skips
+        self.lanes = {
+            priority: asyncio.Queue(max_depth or 0) for priority in self.priorities
+        }
+        # control items, i.e EXITING, are unbounded & served first
+        self.control = deque()
+        self.skipped = {priority: 0 for priority in self.priorities}
+        self.ready = asyncio.Event()
+        self.reset_stats()
+    def reset_stats(self):
+        """
+        resets peak depth, waited & rejected counters
+        """
+        self.counters = {
+            priority: {'peak': 0, 'waited': 0, 'rejected': 0} 
+            for priority in self.priorities
+        }
+    def stats(self):
+        """
+        returns current depth, max_depth, peak depth, puts which waited
+        for space & puts rejected, per lane
+        """
+        return {
+            priority: {
+                'depth': lane.qsize(), 
+                'max_depth': self.max_depth,
+                **self.counters[priority]
+            }
+            for priority, lane in self.lanes.items()
+        }
+    async def put(self, item, priority='write'):
+        lane = self.lanes[priority]
+        if lane.full():
+            if self.queue_full == 'raise':
+                self.counters[priority]['rejected'] += 1
+                raise QueueFullError(
+                    priority, 
+                    f"{priority} queue is full with {lane.qsize()} queries, retry later or raise max_queue_depth"
+                )
+            self.counters[priority]['waited'] += 1
+        await lane.put(item)
+        self.counters[priority]['peak'] = max(self.counters[priority]['peak'], lane.qsize())
+        self.ready.set()
+    def put_control(self, item):
+        self.control.append(item)
+        self.ready.set()
+    def get_nowait(self):
+        if self.control:
+            return self.control.popleft()
+        chosen = None
+        for priority in self.priorities:
+            if self.lanes[priority].empty():
+                self.skipped[priority] = 0
+                continue
+            if chosen is None:
+                chosen = priority
+            elif self.skipped[priority] >= self.max_skips:
+                # served next, once, ahead of higher priorities
+                chosen = priority
+                break
+        if chosen is None:
+            raise asyncio.QueueEmpty
+        for priority in self.priorities:
+            if priority == chosen:
+                self.skipped[priority] = 0
+            elif not self.lanes[priority].empty():
+                self.skipped[priority] += 1
+        return self.lanes[chosen].get_nowait()
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self.ready.clear()
+                await self.ready.wait()
+    async def wait(self, timeout):
+        """
+        waits at most timeout seconds for a query to be queued, returns
+        True once one is, without removing it
+        """
+        if not self.empty():
+            return True
+        self.ready.clear()
+        timer = asyncio.get_running_loop().call_later(timeout, self.ready.set)
+        try:
+            await self.ready.wait()
+        finally:
+            timer.cancel()
+        return not self.empty()
+    def empty(self):
+        return not self.control and all(lane.empty() for lane in self.lanes.values())
+    def qsize(self):
+        return len(self.control) + sum(lane.qsize() for lane in self.lanes.values())
@@ -1,6 +1,7 @@
 from collections import deque
-from aiomysql import create_pool
-from aiopyql.utilities import flatten, no_blanks, inner, TableColumn
+from contextlib import asynccontextmanager
+from aiomysql import create_pool, connect, SSCursor
+from aiopyql.utilities import flatten, no_blanks, inner, TableColumn, BulkValues
 from aiopyql.exceptions import InvalidColumnType
 import json, time
 
@@ -15,6 +16,7 @@ TRANSLATION = {
     'boolean': bool,
     'blob': bytes,
     'varchar': str,
+    'json': dict,
 }
 def get_table_schema(table):
     constraints = ''
@@ -138,14 +140,24 @@ def validate_where_input(db, tables, where):
         for col_name, col in table.columns.items():
             if not col_name in where:
                 continue
+            if col.type == dict:
+                #JSON column
+                if where[col_name] in [None, 'NULL']:
+                    where[col_name] = None
+                elif not isinstance(where[col_name], str):
+                    where[col_name] = json.dumps(where[col_name])
+                continue
             if not col.type == bool:
                 #JSON handling
                 if col.type == str and type(where[col_name]) == dict:
-                    where[col_name] = f"'{col.type(json.dumps(where[col_name]))}'"
+                    where[col_name] = json.dumps(where[col_name])
                     continue
-                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else 'NULL'
+                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else None
                 continue
             # Bool column Type
+            if where[col_name] in [None, 'NULL']:
+                where[col_name] = None
+                continue
             try:
                 where[col_name] = col.type(int(where[col_name])) if table.database.type == 'mysql' else int(col.type(int(where[col_name])))
             except Exception as e:
@@ -159,19 +171,65 @@ def validate_where_input(db, tables, where):
                     del(where[col_name])
                     continue
     return where
-async def process_query_no_commit(db, conn, query_id, query):
+def get_upsert_clause(table, columns):
+    """
+    returns clause appended to an INSERT of columns, which updates 
+    the existing row on a table.prim_key conflict
+    """
+    update_cols = [col for col in columns if not col == table.prim_key]
+    if not update_cols:
+        update_cols = [table.prim_key]
+    update_cols = ', '.join([f"{col}=VALUES({col})" for col in update_cols])
+    return f"ON DUPLICATE KEY UPDATE {update_cols}"
+
+def get_param_placeholder(index):
+    """
+    format style bind parameter, index is unused
+    """
+    return '%s'
+
+async def process_query_no_commit(db, conn, query_future, query, values=None):
     results = []
-    db.log.debug(f"{db.db_name} - execute: {query}")
-    await conn[0].execute(query)
+    db.log.debug(f"{db.db_name} - execute: {query} - values: {values}")
+    await conn[0].execute(query, values)
     result = await conn[0].fetchall()          
     for row in result:
         results.append(row)
     return result
-def process_query_commit(db, conn, conn_id, query_id, query):
+def process_query_commit(db, conn, conn_id, query_future, query, values=None):
+    if isinstance(values, BulkValues):
+        # executemany rewrites INSERT .. VALUES into multi-row VALUES 
+        query_coro = conn[0].executemany(query, values.rows)
+    else:
+        query_coro = conn[0].execute(query, values)
     db.querries_to_commit[conn_id].append(
-        (query_id, query, conn[0].execute(query))
+        (query_future, query, query_coro)
     )
 
+@asynccontextmanager
+async def stream_connection(db):
+    """
+    dedicated connection for streamed selects, an unbuffered cursor 
+    holds its connection until all rows are read
+    """
+    conn = await connect(**db.connect_config)
+    try:
+        async with conn.cursor() as cursor:
+            yield (cursor, conn)
+    finally:
+        conn.close()
+async def stream_query(db, conn, query, values, batch_size):
+    """
+    async generator yielding lists of at most batch_size rows, 
+    read via an unbuffered server side cursor 
+    """
+    async with conn[1].cursor(SSCursor) as cursor:
+        await cursor.execute(query, values)
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
 async def submit_commit_pool(db, conn, conn_id):
     if len(db.querries_to_commit[conn_id]) > 0:
         db.log.debug(f"queue empty, commiting: {db.querries_to_commit[conn_id]}")
@@ -182,6 +240,36 @@ async def submit_commit_pool(db, conn, conn_id):
         db.querries_to_commit[conn_id] = deque()
 
 
+async def prepare_connection(db, conn, lane):
+    """
+    reader lane connections use autocommit, otherwise each would keep
+    the REPEATABLE READ snapshot of its first read & never see rows 
+    committed by the writer lane
+    """
+    if lane == 'read':
+        await conn[1].autocommit(True)
+
+async def start_transaction(db, conn):
+    """
+    returns object with commit & rollback of a transaction on conn,
+    autocommit is disabled, so the connection is the transaction
+    """
+    return conn[1]
+
+async def cancel_query(db, conn, query_task):
+    """
+    kills the statement of query_task running on conn via KILL QUERY 
+    on a side connection, the connection remains usable
+    """
+    thread_id = conn[1].thread_id()
+    side_conn = await connect(**db.connect_config)
+    try:
+        async with side_conn.cursor() as cursor:
+            if not query_task.done():
+                await cursor.execute(f"KILL QUERY {int(thread_id)}")
+    finally:
+        side_conn.close()
+
 async def migrate_table(db, new_table):
     log = db.log
 
@@ -236,12 +324,10 @@ async def migrate_table(db, new_table):
                 await db.tables[table].create_schema()
         tables_to_migrate.reverse()
         for table in tables_to_migrate:
-            for row in table_copies[table]:
-                if table == new_table.name:
-                    migrated_row = {k: v for k,v in row.items() if k in new_table_cols}
-                    await db.tables[table].insert(**migrated_row)
-                else:
-                    await db.tables[table].insert(**row)
+            rows = table_copies[table]
+            if table == new_table.name:
+                rows = [{k: v for k,v in row.items() if k in new_table_cols} for row in rows]
+            await db.tables[table].insert_many(rows)
 
         await db.run(
             f'DROP TABLE {new_table.name}_old'
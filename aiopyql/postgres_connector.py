@@ -1,7 +1,8 @@
 import json, time
 from collections import deque
-from asyncpg import create_pool
-from aiopyql.utilities import flatten, no_blanks, inner, TableColumn
+from contextlib import asynccontextmanager
+from asyncpg import create_pool, connect
+from aiopyql.utilities import flatten, no_blanks, inner, TableColumn, BulkValues
 from aiopyql.exceptions import InvalidColumnType
 
 row_return_type = dict
@@ -15,7 +16,8 @@ TRANSLATION = {
     'character': str,
     'varchar': str,
     'char': str,
-    'serial': int # with AUTOINCREMENT extra
+    'serial': int, # with AUTOINCREMENT extra
+    'jsonb': dict
 }
 
 def get_table_schema(table):
@@ -231,14 +233,24 @@ def validate_where_input(db, tables, where):
         for col_name, col in table.columns.items():
             if not col_name in where:
                 continue
+            if col.type == dict:
+                #JSON column
+                if where[col_name] in [None, 'NULL']:
+                    where[col_name] = None
+                elif not isinstance(where[col_name], str):
+                    where[col_name] = json.dumps(where[col_name])
+                continue
             if not col.type == bool:
                 #JSON handling
                 if col.type == str and type(where[col_name]) == dict:
-                    where[col_name] = f"'{col.type(json.dumps(where[col_name]))}'"
+                    where[col_name] = json.dumps(where[col_name])
                     continue
-                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else 'NULL'
+                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else None
                 continue
             # Bool column Type
+            if where[col_name] in [None, 'NULL']:
+                where[col_name] = None
+                continue
             try:
                 where[col_name] = col.type(int(where[col_name])) #if table.database.type == 'mysql' else int(col.type(int(where[col_name])))
             except Exception as e:
@@ -254,16 +266,70 @@ def validate_where_input(db, tables, where):
     return where
 
 
-async def process_query_no_commit(db, conn, query_id, query):
+def get_upsert_clause(table, columns):
+    """
+    returns clause appended to an INSERT of columns, which updates 
+    the existing row on a table.prim_key conflict
+    """
+    update_cols = [col for col in columns if not col == table.prim_key]
+    if not update_cols:
+        return f"ON CONFLICT ({table.prim_key}) DO NOTHING"
+    update_cols = ', '.join([f"{col}=excluded.{col}" for col in update_cols])
+    return f"ON CONFLICT ({table.prim_key}) DO UPDATE SET {update_cols}"
+
+def get_param_placeholder(index):
+    """
+    numeric style bind parameter, index starts at 1
+    """
+    return f'${index}'
+
+async def process_query_no_commit(db, conn, query_future, query, values=None):
     results = []
-    db.log.debug(f"{db.db_name} - execute: {query}")
-    results = await conn.fetch(query)
+    db.log.debug(f"{db.db_name} - execute: {query} - values: {values}")
+    # fetch prepares query & keeps it in the connection statement 
+    # cache, repeated templates skip parse / plan
+    results = await conn.fetch(query, *(values or ()))
     return results
-def process_query_commit(db, conn, conn_id, query_id, query):
+def process_query_commit(db, conn, conn_id, query_future, query, values=None):
+    if isinstance(values, BulkValues) and not values.upsert:
+        # bulk rows are streamed via COPY rather than the INSERT template
+        query_coro = conn.copy_records_to_table(
+            values.table, records=values.rows, columns=values.columns
+        )
+    elif isinstance(values, BulkValues):
+        # COPY cannot resolve conflicts, upserts use the prepared template
+        query_coro = conn.executemany(query, values.rows)
+    elif values:
+        query_coro = conn.execute(query, *values)
+    else:
+        query_coro = conn.execute(query)
     db.querries_to_commit[conn_id].append(
-        (query_id, query, conn.execute(query))
+        (query_future, query, query_coro)
     )
 
+@asynccontextmanager
+async def stream_connection(db):
+    """
+    dedicated connection for streamed selects, server side cursors 
+    hold a transaction open until all rows are read
+    """
+    conn = await connect(**db.connect_config)
+    try:
+        yield conn
+    finally:
+        await conn.close()
+async def stream_query(db, conn, query, values, batch_size):
+    """
+    async generator yielding lists of at most batch_size rows, 
+    read via a server side cursor - requires a transaction
+    """
+    async with conn.transaction():
+        cursor = await conn.cursor(query, *(values or ()))
+        while True:
+            rows = await cursor.fetch(batch_size)
+            if not rows:
+                break
+            yield rows
 async def submit_commit_pool(db, conn, conn_id):
     if len(db.querries_to_commit[conn_id]) > 0:
         db.log.debug(f"queue empty, commiting: {db.querries_to_commit[conn_id]}")
@@ -273,6 +339,28 @@ async def submit_commit_pool(db, conn, conn_id):
         )
         db.querries_to_commit[conn_id] = deque()
 
+async def prepare_connection(db, conn, lane):
+    """
+    statements run in autocommit mode, reader connections need no setup
+    """
+    return
+
+async def start_transaction(db, conn):
+    """
+    returns started transaction on conn, statements otherwise run 
+    in autocommit mode
+    """
+    transaction = conn.transaction()
+    await transaction.start()
+    return transaction
+
+async def cancel_query(db, conn, query_task):
+    """
+    cancelling query_task sends a cancel request for the running 
+    statement to the server, the connection remains usable
+    """
+    query_task.cancel()
+
 async def migrate_table(db, new_table):
     log = db.log
 
@@ -328,12 +416,10 @@ async def migrate_table(db, new_table):
                 await db.tables[table].create_schema()
         tables_to_migrate.reverse()
         for table in tables_to_migrate:
-            for row in table_copies[table]:
-                if table == new_table.name:
-                    migrated_row = {k: v for k,v in row.items() if k in new_table_cols}
-                    await db.tables[table].insert(**migrated_row)
-                else:
-                    await db.tables[table].insert(**row)
+            rows = table_copies[table]
+            if table == new_table.name:
+                rows = [{k: v for k,v in row.items() if k in new_table_cols} for row in rows]
+            await db.tables[table].insert_many(rows)
 
         await db.run(
             f'DROP TABLE {new_table.name}_old'
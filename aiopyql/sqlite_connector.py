@@ -1,6 +1,6 @@
 from collections import deque
 from aiosqlite import connect
-from aiopyql.utilities import flatten, no_blanks, inner, TableColumn
+from aiopyql.utilities import flatten, no_blanks, inner, TableColumn, BulkValues
 from aiopyql.exceptions import InvalidColumnType
 import json
 import time
@@ -14,6 +14,7 @@ TRANSLATION = {
     'boolean': bool,
     'blob': bytes,
     'varchar': str,
+    'json': dict,
 }
 def get_table_schema(table):
     constraints = ''
@@ -134,14 +135,24 @@ def validate_where_input(db, tables, where):
         for col_name, col in table.columns.items():
             if not col_name in where:
                 continue
+            if col.type == dict:
+                #JSON column
+                if where[col_name] in [None, 'NULL']:
+                    where[col_name] = None
+                elif not isinstance(where[col_name], str):
+                    where[col_name] = json.dumps(where[col_name])
+                continue
             if not col.type == bool:
                 #JSON handling
                 if col.type == str and type(where[col_name]) == dict:
-                    where[col_name] = f"'{col.type(json.dumps(where[col_name]))}'"
+                    where[col_name] = json.dumps(where[col_name])
                     continue
-                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else 'NULL'
+                where[col_name] = col.type(where[col_name]) if not where[col_name] in [None, 'NULL'] else None
                 continue
             # Bool column Type
+            if where[col_name] in [None, 'NULL']:
+                where[col_name] = None
+                continue
             try:
                 where[col_name] = int(col.type(int(where[col_name])))
             except Exception as e:
@@ -156,16 +167,55 @@ def validate_where_input(db, tables, where):
                     continue
     return where
 
-async def process_query_no_commit(db, conn, query_id, query):
+def get_upsert_clause(table, columns):
+    """
+    returns clause appended to an INSERT of columns, which updates 
+    the existing row on a table.prim_key conflict
+    """
+    update_cols = [col for col in columns if not col == table.prim_key]
+    if not update_cols:
+        return f"ON CONFLICT ({table.prim_key}) DO NOTHING"
+    update_cols = ', '.join([f"{col}=excluded.{col}" for col in update_cols])
+    return f"ON CONFLICT ({table.prim_key}) DO UPDATE SET {update_cols}"
+
+def get_param_placeholder(index):
+    """
+    qmark style bind parameter, index is unused
+    """
+    return '?'
+
+async def process_query_no_commit(db, conn, query_future, query, values=None):
     results = []
-    async with conn.execute(query) as cursor:
+    async with conn.execute(query, values) as cursor:
         async for row in cursor:
             results.append(row)
     return results
-def process_query_commit(db, conn, conn_id, query_id, query):
+def process_query_commit(db, conn, conn_id, query_future, query, values=None):
+    if isinstance(values, BulkValues):
+        query_coro = conn.executemany(query, values.rows)
+    else:
+        query_coro = conn.execute(query, values)
     db.querries_to_commit[conn_id].append(
-        (query_id, query, conn.execute(query))
+        (query_future, query, query_coro)
     )
+def stream_connection(db):
+    """
+    returns context manager of a dedicated connection for streamed 
+    selects, or None for in-memory databases, which are per connection
+    """
+    if ':memory:' in db.db_name:
+        return None
+    return connect(**db.connect_config)
+async def stream_query(db, conn, query, values, batch_size):
+    """
+    async generator yielding lists of at most batch_size rows
+    """
+    async with conn.execute(query, values) as cursor:
+        while True:
+            rows = await cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
 async def submit_commit_pool(db, conn, conn_id):
     if len(db.querries_to_commit[conn_id]) > 0:
         db.log.debug(f"queue empty, commiting: {db.querries_to_commit[conn_id]}")
@@ -175,6 +225,29 @@ async def submit_commit_pool(db, conn, conn_id):
         )
         db.querries_to_commit[conn_id] = deque()
 
+async def prepare_connection(db, conn, lane):
+    """
+    file databases use WAL mode, so reads of other processor & stream
+    connections do not block & are not blocked by commits of the writer
+    """
+    if not ':memory:' in db.db_name:
+        await conn.execute('PRAGMA journal_mode=WAL')
+
+async def start_transaction(db, conn):
+    """
+    returns object with commit & rollback of a transaction on conn, 
+    sqlite begins transactions implicitly on the first write
+    """
+    return conn
+
+async def cancel_query(db, conn, query_task):
+    """
+    interrupts the statement of query_task running on conn, the 
+    statement raises an interrupted OperationalError
+    """
+    if not query_task.done():
+        await conn.interrupt()
+
 async def migrate_table(db, new_table):
     log = db.log
 
@@ -229,12 +302,10 @@ async def migrate_table(db, new_table):
                 await db.tables[table].create_schema()
         tables_to_migrate.reverse()
         for table in tables_to_migrate:
-            for row in table_copies[table]:
-                if table == new_table.name:
-                    migrated_row = {k: v for k,v in row.items() if k in new_table_cols}
-                    await db.tables[table].insert(**migrated_row)
-                else:
-                    await db.tables[table].insert(**row)
+            rows = table_copies[table]
+            if table == new_table.name:
+                rows = [{k: v for k,v in row.items() if k in new_table_cols} for row in rows]
+            await db.tables[table].insert_many(rows)
 
         await db.run(
             f'DROP TABLE {new_table.name}_old'
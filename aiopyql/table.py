@@ -1,7 +1,12 @@
-import json
+import asyncio
+import re
+import hashlib
 from typing import Optional
+from collections import OrderedDict
+from collections.abc import Hashable
 from aiopyql.cache import Cache
-from aiopyql.exceptions import InvalidColumnType, InvalidInputError
+from aiopyql.exceptions import InvalidColumnType, InvalidInputError, QueryTimeoutError
+from aiopyql.utilities import BulkValues, json_loads, numpy
 
 class Table:
     def __init__(
@@ -12,19 +17,57 @@ class Table:
         prim_key: str,
         foreign_keys: dict = None,
         cache_enabled: Optional[bool] = False,
-        max_cache_len: Optional[int] = 125
+        max_cache_len: Optional[int] = 125,
+        max_cache_bytes: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        cache_policy: Optional[str] = 'lru',
+        cache_indexes: Optional[list] = None,
+        resident: Optional[bool] = False,
+        max_negative_cache_len: Optional[int] = 1000,
+        negative_cache_ttl: Optional[float] = 60,
+        lookup_batch_window: Optional[float] = None,
+        write_mode: Optional[str] = 'sync'
     ):
         self.name = name
         self.database = database
         self.log = self.database.log
-        self.types = {int,str,float,bool,bytes}
+        self.types = {int,str,float,bool,bytes,dict}
         
         self.cache_enabled = cache_enabled
         self.max_cache_len = max_cache_len
+        self.max_cache_bytes = max_cache_bytes
+        self.cache_ttl = cache_ttl
+        self.cache_policy = cache_policy
+        self.cache_indexes = list(cache_indexes) if cache_indexes else []
+        # primary keys known to be missing, bounded & expired separately
+        self.max_negative_cache_len = max_negative_cache_len
+        self.negative_cache_ttl = negative_cache_ttl
+        self.missing_keys = None
         self.cache = None
+
+        # resident tables keep all rows in memory, loaded via load_resident
+        self.resident = resident
+        self.resident_rows = None
+
+        # table[key] lookups made within lookup_batch_window seconds are 
+        # fetched together via get_many, None disables batching
+        self.lookup_batch_window = lookup_batch_window
+        self.pending_lookups = {}
+        self.lookup_flush = None
+
+        # async - writes return once queued, see Database.submit_write
+        if not write_mode in {'sync', 'async'}:
+            raise InvalidInputError(
+                f"write_mode {write_mode} is invalid", "use one of {'sync', 'async'}"
+            )
+        self.write_mode = write_mode
         if self.cache_enabled:
             self.enable_cache()
 
+        # compiled query templates, keyed on call shape
+        self.compiled_queries = OrderedDict()
+        self.max_compiled_queries = 128
+
         self.columns = {}
         for c in columns:
             if not c.type in self.types:
@@ -38,6 +81,12 @@ class Table:
                     f"column names may only be specified once for table objects"
                 )
             self.columns[c.name] = c
+        for column in self.cache_indexes:
+            if not column in self.columns or self.columns[column].type == dict:
+                raise InvalidInputError(
+                    f"cache_indexes column {column} is invalid", 
+                    f"cache_indexes should be non dict columns of {list(self.columns)}"
+                )
         if prim_key is not None:
             self.prim_key = prim_key if prim_key in self.columns else None
         self.foreign_keys = foreign_keys
@@ -50,13 +99,79 @@ class Table:
         """
         if self.cache == None:
             self.cache_enabled = True
-            self.cache = Cache(self)
+            self.cache = Cache(self, indexes=self.cache_indexes)
+            self.missing_keys = Cache(
+                self, 
+                max_len=self.max_negative_cache_len, 
+                max_bytes=None, 
+                ttl=self.negative_cache_ttl, 
+                policy='lru'
+            )
         else:
             self.log.error("enable_cache called while cache exists, first disable & then enable")
     def disable_cache(self, **kw):
         if not self.cache == None:
             self.cache = None
+            self.missing_keys = None
             self.cache_enabled = False
+    def cache_stats(self, reset: bool = False):
+        """
+        returns table cache hits, misses, negative_hits (known missing 
+        keys), evictions by reason, invalidations, entries & bytes or 
+        None if cache is disabled, reset=True resets counters
+        """
+        if self.cache == None:
+            return None
+        stats = self.cache.stats()
+        missing_stats = self.missing_keys.stats()
+        stats['negative_hits'] = missing_stats['hits']
+        stats['negative_entries'] = missing_stats['entries']
+        if reset:
+            self.cache.reset_stats()
+            self.missing_keys.reset_stats()
+        return stats
+    async def invalidate_cache(self):
+        """
+        clears cached & known missing rows, resident rows are reloaded
+        """
+        if self.cache_enabled:
+            self.cache.clear()
+            self.missing_keys.clear()
+        await self.__reload_resident()
+    def __missing_key(self, kw):
+        """
+        returns the primary key value of where={prim_key: value}, 
+        the only where shape for which an empty result means the
+        key is missing
+        """
+        where = kw.get('where')
+        if (isinstance(where, dict) and len(where) == 1 and self.prim_key in where 
+            and not 'join' in kw and not 'limit' in kw and not 'after' in kw
+            and isinstance(where[self.prim_key], Hashable)):
+            return where[self.prim_key]
+        return None
+    def clear_compiled_queries(self):
+        """
+        called when the schema of this or a joined table changes
+        """
+        self.compiled_queries.clear()
+    def __compiled_query(self, key, values, compile_query):
+        """
+        returns (plan, values) for a call shape key, plan is compiled via 
+        compile_query() -> (plan, compiled_values) on first use, then 
+        only values are bound on repeat calls
+        """
+        if key is not None and key in self.compiled_queries:
+            self.compiled_queries.move_to_end(key)
+            return self.compiled_queries[key], values
+        plan, compiled_values = compile_query()
+        if key is None or not compiled_values == values:
+            # shape cannot be cached
+            return plan, compiled_values
+        self.compiled_queries[key] = plan
+        if len(self.compiled_queries) > self.max_compiled_queries:
+            self.compiled_queries.popitem(last=False)
+        return plan, values
     async def get_schema(self):
         return self.database.get_table_schema(self)
     async def create_schema(self):
@@ -96,7 +211,24 @@ class Table:
                 f"{column} is not a valid column in table {table}", 
                 "invalid column specified for 'where'")
         return table, column
-    def __where(self, kw):
+    def _convert_value(self, table, column, value):
+        """
+        converts value to the type expected by table.column
+        """
+        return self.database._validate_where_input(
+            [self.database.tables[table]], {column: value}
+        ).get(column)
+    def _bind_value(self, values, value):
+        """
+        appends value to values & returns the database placeholder for it
+        """
+        values.append(value)
+        return self.database.param_placeholder(len(values))
+    def __where(self, kw, values):
+        """
+        returns WHERE clause for kw['where'], condition values are 
+        appended to values & referenced via bind placeholders
+        """
         where_sel = ''
         kw = self._process_input(kw)
         if not 'where' in kw:
@@ -128,65 +260,107 @@ class Table:
                         raise InvalidInputError(
                             f"Invalid operator {operator} within {condition}", f"supported operators [{supported_operators}]"
                         )
-                    for i, value in enumerate([condition1, condition2]):
-                        if i == 0:
-                            table, column = self._validate_table_column(value)
-                            pass
-                        if i == 1 and 'in' in operator:
-                            # in operators should be proceeded by a list of values
-                            if not isinstance(condition2, list):
-                                raise InvalidInputError(
-                                    f"Invalid use of operator '{operator}' within {condition}", 
-                                    f"'in' should be proceeded by ['list', 'of', 'values'] not {type(condition2)} - {condition2}"
-                                )
-                            if self.database.tables[table].columns[column].type == str:
-                                condition2 = [f"'{cond}'" for cond in condition2]
-                            else:
-                                condition2 = [str(cond) for cond in condition2]
-                            condition2 = ', '.join(condition2)
-                            condition2 = f"({condition2})"
-                            break
-                        if i == 1:
-                            self._validate_table_column(value, no_raise=True)
-                            """still raises if dot_table used & not in table """
-                            pass
-
-                    if 'like' in operator:
-                        condition2 = f"{condition2}"
-                        if not '*' in condition2:
-                            condition2 = f"'%{condition2}%'"
-                        else:
-                            condition2 = '%'.join(condition2.split('*'))
-                            condition2 = f"'{condition2}'"
+                    table, column = self._validate_table_column(condition1)
+                    if 'in' in operator:
+                        # in operators should be proceeded by a list of values
+                        if not isinstance(condition2, list):
+                            raise InvalidInputError(
+                                f"Invalid use of operator '{operator}' within {condition}", 
+                                f"'in' should be proceeded by ['list', 'of', 'values'] not {type(condition2)} - {condition2}"
+                            )
+                        condition2 = ', '.join(
+                            [self._bind_value(values, self._convert_value(table, column, cond)) for cond in condition2]
+                        )
+                        condition2 = f"({condition2})"
+                    elif 'like' in operator:
+                        condition2 = self._bind_value(values, self._like_pattern(condition2))
+                    elif self._is_column_reference(condition2):
+                        # column reference, still raises if not in table 
+                        self._validate_table_column(condition2)
+                    else:
+                        condition2 = self._bind_value(values, self._convert_value(table, column, condition2))
 
-                    
                     where_sel = f"{where_sel}{and_value}{condition1} {operator} {condition2}"
                 if isinstance(condition, dict):
-                    for col_name, v in condition.items():
-                        table, column = self._validate_table_column(col_name)
-                        table = self.database.tables[table]
-                        eq = '=' if not v == 'NULL' else ' IS '
-                        #json check
-                        if v == 'NULL' or table.columns[column].type == str and '{"' and '}' in v:
-                            where_sel = f"{where_sel}{and_value}{col_name}{eq}{v}"
-                        else:
-                            val = v if table.columns[column].type is not str else f"'{v}'"
-                            where_sel = f"{where_sel}{and_value}{col_name}{eq}{val}"
+                    where_sel = self.__where_equals(condition, values, where_sel, and_value)
 
                 and_value = ' AND '
                     
         if isinstance(kw['where'], dict):
-            for col_name, v in kw['where'].items():
-                table, column = self._validate_table_column(col_name)
-                table = self.database.tables[table]
-                eq = '=' if not v == 'NULL' else ' IS '
-                #json check
-                if v == 'NULL' or table.columns[column].type == str and '{"' and '}' in v:
-                    where_sel = f"{where_sel}{and_value}{col_name}{eq}{v}"
-                else:
-                    val = v if table.columns[column].type is not str else f"'{v}'"
-                    where_sel = f"{where_sel}{and_value}{col_name}{eq}{val}"
-                and_value = ' AND '
+            where_sel = self.__where_equals(kw['where'], values, where_sel, and_value)
+        return where_sel
+    def _like_pattern(self, value):
+        """
+        converts '*' wild cards to '%', values without '*' match anywhere
+        """
+        value = f"{value}"
+        if not '*' in value:
+            return f"%{value}%"
+        return '%'.join(value.split('*'))
+    def _is_column_reference(self, value):
+        """
+        True if where condition value is a 'table.column' reference
+        """
+        return (
+            isinstance(value, str) and '.' in value and 
+            value.split('.')[0] in self.database.tables
+        )
+    def _split_column(self, col_name):
+        """
+        returns table, column for 'table.column' or 'column' of this table 
+        """
+        if isinstance(col_name, str) and '.' in col_name:
+            return col_name.split('.')
+        return self.name, col_name
+    def __where_values(self, where, values):
+        """
+        appends values bound by __where in placeholder order, without 
+        rendering or validating the query, returns the shape of where 
+        used to key compiled queries or None if where is not valid
+        """
+        shape = []
+        for condition in where if isinstance(where, list) else [where]:
+            if isinstance(condition, dict):
+                condition_shape = []
+                for col_name, v in condition.items():
+                    v = self._convert_value(*self._split_column(col_name), v)
+                    if v is not None:
+                        values.append(v)
+                    condition_shape.append((col_name, v is None))
+                shape.append(tuple(condition_shape))
+                continue
+            if not isinstance(condition, list) or not len(condition) == 3:
+                return None
+            col_name, operator, condition2 = f"{condition[0]}", condition[1], condition[2]
+            table, column = self._split_column(col_name)
+            if not isinstance(operator, str) or not table in self.database.tables:
+                return None
+            if 'in' in operator:
+                if not isinstance(condition2, list):
+                    return None
+                values.extend([self._convert_value(table, column, cond) for cond in condition2])
+                shape.append((col_name, operator, len(condition2)))
+            elif 'like' in operator:
+                values.append(self._like_pattern(condition2))
+                shape.append((col_name, operator))
+            elif self._is_column_reference(condition2):
+                shape.append((col_name, operator, condition2))
+            else:
+                values.append(self._convert_value(table, column, condition2))
+                shape.append((col_name, operator, None))
+        return tuple(shape)
+    def __where_equals(self, condition, values, where_sel, and_value):
+        """
+        appends 'col = <placeholder>' for each col, value in condition
+        """
+        for col_name, v in condition.items():
+            table, column = self._validate_table_column(col_name)
+            v = self._convert_value(table, column, v)
+            if v is None:
+                where_sel = f"{where_sel}{and_value}{col_name} IS NULL"
+            else:
+                where_sel = f"{where_sel}{and_value}{col_name}={self._bind_value(values, v)}"
+            and_value = ' AND '
         return where_sel
     def _join(self, kw):
         join = ''
@@ -214,19 +388,11 @@ class Table:
                 count+=1
         return join
 
-    async def select(self, selection, *args,  **kw):
+    def __compile_select(self, selection, args, kw):
         """
-        Usage: returns list of dictionaries for each selection in each row. 
-            tb = db.tables['stocks_new_tb2']
-
-            sel = tb.select('order_num',
-                            'symbol', 
-                            where={'trans': 'BUY', 'qty': 100})
-            sel = tb.select('*')
-            # Iterate through table
-            sel = [row for row in tb]
-            # Using Primary key only
-            sel = tb[0] # select * from <table> where <table_prim_key> = <val>
+        validates select input, returns query, bind values, row & columns 
+        decoders, selected columns, if rows may be cached & the tables 
+        the query depends on
         """
         col_select = [selection] + list(args) if not isinstance(selection, list) else selection
         col_select = [i for i in col_select]
@@ -302,7 +468,8 @@ class Table:
             selection = ','.join(col_select)
 
         # validates where conditions provided and where query
-        where_sel = self.__where(kw)
+        values = []
+        where_sel = self.__where(kw, values)
 
         join = ''
         if 'join' in kw:
@@ -310,88 +477,634 @@ class Table:
             join = self._join(kw)
 
             cache_new_rows = False
+
+        orderby = self.__orderby(kw)
+        if 'after' in kw:
+            where_sel = self.__after(kw, orderby, where_sel, values)
+        if orderby:
+            orderby = ' ORDER BY ' + ', '.join(
+                [f"{column} {direction}" for column, direction in orderby]
+            )
         else:
-            # join statements cannot return cached rows with 
-            # cache check
-            if 'where' in kw and isinstance(kw['where'], dict) and self.cache_enabled:
-                cached_row = None
-                for column, value in kw['where'].items():
-                    # primary key used in where statement
-                    if column == self.prim_key:
-                        # check if value exists in cache
-                        if value in self.cache:
-                            cached_row = self.cache[value]
-                # check cached_row against other where conditions
-                # As primary key was used, we know only 1 row should ever 
-                # exist so remaining conditions can be safely validated
-                if not cached_row == None:
-                    for column, value in kw['where'].items():
-                        if column == self.prim_key:
-                            continue
-                        # check cached value against 'where' value
-                        if not cached_row[column] == value:
-                            # no rows match condition
-                            return []
-                    # return cache row
-                    if '*' in selection:
-                        self.log.debug(f"## cache - SELECT * - {cached_row} ##")
-                        return [cached_row]
-                    else:
-                        cached_row = {sel: cached_row[sel] for sel in col_select}
-                        self.log.debug(f"## cache - SELECT {col_select} - {cached_row} ##")
-                        return [cached_row]
-
-        orderby = ''
-        if 'orderby' in kw:
-            if not kw['orderby'] in self.columns:
-                raise InvalidInputError(f"orderby input {kw['orderby']} is not a valid column name", f"valid columns {self.columns}")
-            orderby = ' ORDER BY '+ kw['orderby']
-        query = 'SELECT {select_item} FROM {name} {join}{where}{order}'.format(
+            orderby = ''
+        query = 'SELECT {select_item} FROM {name} {join}{where}{order}{limit}'.format(
             select_item = selection,
             name = self.name,
             join=join,
             where = where_sel,
-            order = orderby
+            order = orderby,
+            limit = self.__limit(kw, values)
+        )
+        return (
+            query, 
+            values, 
+            self.__row_decoder(col_refs, keys), 
+            self.__columns_decoder(col_refs, keys), 
+            col_select, 
+            cache_new_rows,
+            frozenset([self.name] + list(kw['join'] if 'join' in kw else []))
         )
+    def __orderby(self, kw):
+        """
+        returns [(column, 'ASC'|'DESC')] for orderby='col', 'col desc'
+        or a list of either, ordered by keyset 'after' columns if only 
+        after={} is provided
+        """
+        if not 'orderby' in kw:
+            return [(column, 'ASC') for column in kw.get('after', {})]
+        orderby = kw['orderby'] if isinstance(kw['orderby'], list) else [kw['orderby']]
+        columns = []
+        for order in orderby:
+            column, *direction = f"{order}".split()
+            direction = direction[0].upper() if len(direction) == 1 else direction
+            if not direction:
+                direction = 'ASC'
+            if not direction in {'ASC', 'DESC'}:
+                raise InvalidInputError(f"orderby input {order} is invalid", "use orderby='col', 'col desc' or ['col1', 'col2 desc']")
+            table, col = self._validate_table_column(column, no_raise=True)
+            if not col in self.database.tables[table].columns:
+                raise InvalidInputError(f"orderby input {column} is not a valid column name", f"valid columns {self.columns}")
+            columns.append((column, direction))
+        return columns
+    def __after(self, kw, orderby, where_sel, values):
+        """
+        adds keyset pagination condition for after={col: last_value}
+        to where_sel, i.e (col1, col2) > (last1, last2)
+        """
+        after = kw['after']
+        if not isinstance(after, dict) or len(after) == 0:
+            raise InvalidInputError(after, "use after={'col': <last value>}")
+        directions = {column: direction for column, direction in orderby}
+        after_directions = set()
+        for column in after:
+            if not column in directions:
+                raise InvalidInputError(f"after column {column} is not in orderby {orderby}", "after columns must be ordered")
+            after_directions.add(directions[column])
+        if len(after_directions) > 1:
+            raise InvalidInputError(f"after columns {list(after)} use mixed orderby directions", "after columns must share a direction")
+        operator = '>' if 'ASC' in after_directions else '<'
+        after_values = []
+        for column, value in after.items():
+            table, col = self._validate_table_column(column)
+            after_values.append(self._bind_value(values, self._convert_value(table, col, value)))
+        if len(after) == 1:
+            condition = f"{list(after)[0]} {operator} {after_values[0]}"
+        else:
+            condition = f"({', '.join(after)}) {operator} ({', '.join(after_values)})"
+        and_value = ' AND ' if where_sel else 'WHERE '
+        return f"{where_sel}{and_value}{condition}"
+    def __select_key(self, selection, args, kw):
+        """
+        returns compiled query key & bind values for a select call
+        """
+        values = []
+        kw = self._process_input(kw)
+        where_shape = ()
+        if 'where' in kw:
+            where_shape = self.__where_values(kw['where'], values)
+            if where_shape is None:
+                return None, values
+        after = ()
+        if 'after' in kw:
+            for col_name, value in kw['after'].items():
+                values.append(self._convert_value(*self._split_column(col_name), value))
+            after = tuple(kw['after'])
+        for clause in ['limit', 'offset']:
+            if clause in kw:
+                self.__check_limit(kw, clause)
+                values.append(kw[clause])
+        join = kw.get('join')
+        if isinstance(join, dict):
+            join = tuple(
+                (table, tuple(condition.items())) for table, condition in join.items()
+            )
+        orderby = kw.get('orderby')
+        key = (
+            'select',
+            tuple(selection) if isinstance(selection, list) else (selection,) + tuple(args),
+            join,
+            where_shape,
+            tuple(orderby) if isinstance(orderby, list) else orderby,
+            after,
+            'limit' in kw,
+            'offset' in kw
+        )
+        hash(key)
+        return key, values
+    def __compiled_select(self, selection, args, kw):
+        """
+        returns query, values, decode, decode_columns, col_select, cache_new_rows, 
+        tables using the compiled query for the call shape when available
+        """
         try:
-            rows = await self.database.get(query)
+            key, values = self.__select_key(selection, args, kw)
+        except Exception:
+            # invalid input is raised by __compile_select
+            key, values = None, None
+        def compile_select():
+            query, compiled_values, *plan = self.__compile_select(selection, args, kw)
+            return (query, *plan), compiled_values
+        plan, values = self.__compiled_query(key, values, compile_select)
+        query, decode, decode_columns, col_select, cache_new_rows, tables = plan
+        return query, values, decode, decode_columns, col_select, cache_new_rows, tables
+    def __check_limit(self, kw, clause):
+        if not isinstance(kw[clause], int) or isinstance(kw[clause], bool) or kw[clause] < 0:
+            raise InvalidInputError(f"{clause} input {kw[clause]} is invalid", f"{clause} should be an int >= 0")
+    def __limit(self, kw, values):
+        """
+        returns LIMIT / OFFSET clause for limit= & offset= 
+        """
+        limit = ''
+        for clause in ['limit', 'offset']:
+            if not clause in kw:
+                continue
+            self.__check_limit(kw, clause)
+            if clause == 'offset' and not 'limit' in kw:
+                raise InvalidInputError(f"offset input {kw[clause]} provided without limit", "offset requires limit")
+            limit = f"{limit} {clause.upper()} {self._bind_value(values, kw[clause])}"
+        return limit
+    def __select_cached(self, kw, selection, col_select):
+        """
+        returns [row] from table cache if the primary key is used in
+        where={}, [] if the cached row does not match, otherwise None
+        """
+        if not self.cache_enabled:
+            return None
+        if 'where' in kw and isinstance(kw['where'], dict):
+            cached_row = None
+            for column, value in kw['where'].items():
+                # primary key used in where statement
+                if column == self.prim_key:
+                    # check if value exists in cache
+                    if not isinstance(value, Hashable):
+                        continue
+                    cached_row = self.cache.get(value)
+                    if cached_row is None and self.missing_keys.get(value):
+                        self.log.debug(f"## negative cache - {self.prim_key} {value} missing ##")
+                        return []
+            # check cached_row against other where conditions
+            # As primary key was used, we know only 1 row should ever 
+            # exist so remaining conditions can be safely validated
+            if not cached_row == None:
+                for column, value in kw['where'].items():
+                    if column == self.prim_key:
+                        continue
+                    # check cached value against 'where' value
+                    if not cached_row[column] == value:
+                        # no rows match condition
+                        return []
+                # return cache row
+                if '*' in selection:
+                    self.log.debug(f"## cache - SELECT * - {cached_row} ##")
+                    return [cached_row]
+                else:
+                    cached_row = {sel: cached_row[sel] for sel in col_select}
+                    self.log.debug(f"## cache - SELECT {col_select} - {cached_row} ##")
+                    return [cached_row]
+        return None
+    async def load_resident(self):
+        """
+        loads all rows of a resident table into memory, rows are 
+        indexed by primary key & cache_indexes columns
+        """
+        resident_rows = Cache(
+            self, 
+            indexes=self.cache_indexes, 
+            max_len=float('inf'), 
+            max_bytes=None, 
+            ttl=None, 
+            policy='lru'
+        )
+        for row in await self.__select_rows():
+            resident_rows[row[self.prim_key]] = row
+        self.resident_rows = resident_rows
+        self.log.debug(f"## {self.name} resident - loaded {len(resident_rows)} rows ##")
+    async def __select_rows(self, where=None):
+        """
+        returns decoded rows selected from the database, bypassing 
+        resident rows
+        """
+        kw = {'where': where} if where else {}
+        query, values, decode, _, _, _, tables = self.__compiled_select('*', (), kw)
+        rows = await self.database.get(query, values=values, tables=tables)
+        return decode(rows) if not rows == None else []
+    async def __reload_resident(self, keys=None):
+        """
+        reloads rows of keys from the database into resident rows, 
+        all rows if keys is None
+        """
+        if self.resident_rows is None:
+            return
+        if keys is None:
+            return await self.load_resident()
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return
+        rows = await self.__select_rows([[self.prim_key, 'in', keys]])
+        for key in keys:
+            del self.resident_rows[key]
+        for row in rows:
+            self.resident_rows[row[self.prim_key]] = row
+    def __resident_keys(self, where):
+        """
+        returns primary keys of resident rows matching where, or None 
+        if where cannot be evaluated in memory
+        """
+        conditions = self.__resident_conditions(where)
+        if conditions is None:
+            return None
+        return [
+            key for key, entry in self.resident_rows.cache.items() 
+            if self._resident_match(entry.row, conditions)
+        ]
+    def __resident_conditions(self, where):
+        """
+        returns where as a list of (column, operator, value) with 
+        converted values, or None if where cannot be evaluated in memory
+        """
+        conditions = []
+        for condition in where if isinstance(where, list) else [where]:
+            if isinstance(condition, dict):
+                for col_name, value in condition.items():
+                    table, column = self._split_column(col_name)
+                    if not table == self.name:
+                        return None
+                    value = self._convert_value(table, column, value)
+                    conditions.append((column, 'is' if value is None else '=', value))
+                continue
+            col_name, operator, value = condition
+            table, column = self._split_column(f"{col_name}")
+            if not table == self.name:
+                return None
+            if self._is_column_reference(value):
+                ref_table, ref_column = value.split('.')
+                if not ref_table == self.name:
+                    return None
+                conditions.append((column, operator, (ref_column,)))
+                continue
+            if 'in' in operator:
+                value = [self._convert_value(table, column, v) for v in value]
+            elif 'like' in operator:
+                pattern = ''.join(
+                    '.*' if c == '%' else '.' if c == '_' else re.escape(c)
+                    for c in self._like_pattern(value)
+                )
+                value = re.compile(
+                    pattern, 
+                    re.DOTALL if self.database.type == 'postgres' else re.DOTALL | re.IGNORECASE
+                )
+            else:
+                value = self._convert_value(table, column, value)
+            conditions.append((column, operator, value))
+        return conditions
+    @staticmethod
+    def _resident_match(row, conditions):
+        """
+        True if row matches all conditions, NULL values only match 'is'
+        """
+        for column, operator, value in conditions:
+            row_value = row.get(column)
+            if operator == 'is':
+                if not row_value is None:
+                    return False
+                continue
+            if isinstance(value, tuple):
+                # column reference
+                value = row.get(value[0])
+            if row_value is None or (value is None and not 'in' in operator):
+                return False
+            if isinstance(row_value, (dict, list)) and isinstance(value, str):
+                try:
+                    value = json_loads(value)
+                except ValueError:
+                    pass
+            try:
+                if operator in {'=', '=='}:
+                    matched = row_value == value
+                elif operator in {'<>', '!='}:
+                    matched = not row_value == value
+                elif operator == '>':
+                    matched = row_value > value
+                elif operator == '>=':
+                    matched = row_value >= value
+                elif operator == '<':
+                    matched = row_value < value
+                elif operator == '<=':
+                    matched = row_value <= value
+                elif operator == 'in':
+                    matched = row_value in value
+                elif operator == 'not in':
+                    matched = not row_value in value
+                elif operator == 'like':
+                    matched = value.fullmatch(f"{row_value}") is not None
+                else: # not like
+                    matched = value.fullmatch(f"{row_value}") is None
+            except TypeError:
+                matched = False
+            if not matched:
+                return False
+        return True
+    def __select_resident(self, kw, col_select):
+        """
+        returns rows of a resident table matching kw, ordered & limited, 
+        or None if kw cannot be evaluated in memory
+        """
+        conditions = []
+        if 'where' in kw:
+            conditions = self.__resident_conditions(kw['where'])
+            if conditions is None:
+                return None
+        resident_rows = self.resident_rows.cache
+        # candidate rows via primary key or cache_indexes equality conditions
+        candidates = None
+        for column, operator, value in conditions:
+            if not operator in {'=', '=='} or isinstance(value, tuple):
+                continue
+            if column == self.prim_key:
+                candidates = {value} if value in resident_rows else set()
+                break
+            if column in self.resident_rows.indexes and isinstance(value, Hashable):
+                keys = self.resident_rows.lookup(column, value)
+                candidates = keys if candidates is None else candidates & keys
+        rows = [
+            entry.row for entry in (
+                resident_rows.values() if candidates is None 
+                else [resident_rows[key] for key in candidates]
+            )
+            if self._resident_match(entry.row, conditions)
+        ]
+        orderby = [
+            (self._split_column(column)[1], direction) for column, direction in self.__orderby(kw)
+        ]
+        if 'after' in kw:
+            # keyset pagination, (col1, col2) > (last1, last2)
+            after_columns = [self._split_column(column)[1] for column in kw['after']]
+            after_values = tuple(
+                self._convert_value(*self._split_column(column), value) 
+                for column, value in kw['after'].items()
+            )
+            descending = dict(orderby)[after_columns[0]] == 'DESC'
+            def after_match(row):
+                row_values = tuple(row.get(column) for column in after_columns)
+                if None in row_values or None in after_values:
+                    return False
+                try:
+                    return row_values < after_values if descending else row_values > after_values
+                except TypeError:
+                    return False
+            rows = [row for row in rows if after_match(row)]
+        # NULLs sort first ascending, except on postgres
+        nulls_first = not self.database.type == 'postgres'
+        for column, direction in reversed(orderby):
+            rows.sort(
+                key=lambda row: (
+                    (row.get(column) is None) != nulls_first, 
+                    row.get(column) if row.get(column) is not None else 0
+                ),
+                reverse=direction == 'DESC'
+            )
+        if 'limit' in kw:
+            offset = kw.get('offset', 0)
+            rows = rows[offset:offset + kw['limit']]
+        if '*' in col_select:
+            return [dict(row) for row in rows]
+        return [
+            {col: row[self._split_column(col)[1]] for col in col_select} for row in rows
+        ]
+    @staticmethod
+    def _decode_json(value):
+        """
+        JSON columns are returned dumped, unless a driver already decoded them
+        """
+        return json_loads(value) if isinstance(value, (str, bytes)) else value
+    @staticmethod
+    def _decode_json_str(value):
+        """
+        str columns may hold JSON dumped dicts
+        """
+        if value is not None and '}' in value:
+            try:
+                return json_loads(value)
+            except ValueError:
+                pass
+        return value
+    def _column_decoder(self, column):
+        """
+        returns callable converting a returned value of column, or None 
+        if the value is returned as is
+        """
+        if column.type == bool:
+            return bool
+        if column.type == dict:
+            return self._decode_json
+        if column.type == str and self.database.decode_json_str:
+            return self._decode_json_str
+        return None
+    def __row_decoder(self, col_refs, keys):
+        """
+        returns decode(rows) -> list of dicts, converters are chosen once 
+        from the column types of the compiled query
+        """
+        if self.database.row_return_type is tuple:
+            keys = tuple(keys)
+            converters = tuple(
+                (i, key, self._column_decoder(col_refs[key])) 
+                for i, key in enumerate(keys) 
+                if self._column_decoder(col_refs[key])
+            )
+            def decode(rows):
+                to_return = []
+                for row in rows:
+                    r_dict = dict(zip(keys, row))
+                    for i, key, converter in converters:
+                        r_dict[key] = converter(row[i])
+                    to_return.append(r_dict)
+                return to_return
+            return decode
+        converters = tuple(
+            (column, self._column_decoder(col)) 
+            for column, col in col_refs.items() 
+            if self._column_decoder(col)
+        )
+        def decode(rows):
+            to_return = []
+            for row in rows:
+                r_dict = dict(row)
+                for column, converter in converters:
+                    if column in r_dict:
+                        r_dict[column] = converter(r_dict[column])
+                to_return.append(r_dict)
+            return to_return
+        return decode
+    def __columns_decoder(self, col_refs, keys):
+        """
+        returns decode(rows) -> dict of column: list of values, built 
+        from the returned rows without a dict per row
+        """
+        if self.database.row_return_type is tuple:
+            keys = tuple(keys)
+            col_types = tuple(col_refs[key].type for key in keys)
+        def decode(rows):
+            if self.database.row_return_type is tuple:
+                row_keys, row_types = keys, col_types
+            else:
+                row_keys = tuple(rows[0].keys()) if rows else tuple(col_refs)
+                row_types = tuple(col_refs[key].type for key in row_keys)
+            columns = list(zip(*rows)) if rows else [() for _ in row_keys]
+            to_return = {}
+            for key, values in zip(row_keys, columns):
+                converter = self._column_decoder(col_refs[key])
+                to_return[key] = (
+                    [converter(v) for v in values] if converter else list(values)
+                )
+            return to_return, dict(zip(row_keys, row_types))
+        return decode
+    @staticmethod
+    def _to_numpy(columns, col_types):
+        """
+        converts dict of column: list of values into typed numpy arrays
+        int columns containing NULL values are returned as float64 with nan
+        """
+        if numpy is None:
+            raise InvalidInputError("result='numpy'", "numpy is not installed, pip install numpy")
+        dtypes = {int: 'int64', float: 'float64', bool: 'bool'}
+        arrays = {}
+        for column, values in columns.items():
+            dtype = dtypes.get(col_types[column], object)
+            if None in values:
+                dtype = 'float64' if dtype in {'int64', 'float64'} else object
+            arrays[column] = numpy.array(values, dtype=dtype)
+        return arrays
+    async def select(self, selection, *args, timeout: Optional[float] = None, **kw):
+        """
+        Usage: returns list of dictionaries for each selection in each row. 
+            tb = db.tables['stocks_new_tb2']
+
+            sel = tb.select('order_num',
+                            'symbol', 
+                            where={'trans': 'BUY', 'qty': 100})
+            sel = tb.select('*')
+            # Iterate through table
+            sel = [row for row in tb]
+            # Using Primary key only
+            sel = tb[0] # select * from <table> where <table_prim_key> = <val>
+            # Columnar results - dict of column: list | numpy array
+            sel = tb.select('qty', 'price', result='columns')
+            sel = tb.select('qty', 'price', result='numpy')
+            # raises QueryTimeoutError after 2 seconds, cancelling the query
+            sel = tb.select('*', where={'symbol': 'RHAT'}, timeout=2)
+        """
+        if timeout is not None:
+            return await self.database.with_timeout(
+                self.select(selection, *args, **kw), timeout, f"select on {self.name}"
+            )
+        result = kw.pop('result', 'rows')
+        if not result in {'rows', 'columns', 'numpy'}:
+            raise InvalidInputError(f"result input {result} is invalid", "use result='rows' | 'columns' | 'numpy'")
+        query, values, decode, decode_columns, col_select, cache_new_rows, tables = self.__compiled_select(
+            selection, args, kw
+        )
+        if self.resident_rows is not None and not 'join' in kw:
+            rows = self.__select_resident(kw, col_select)
+            if rows is not None:
+                if result == 'rows':
+                    return rows
+                keys = list(self.columns) if '*' in col_select else col_select
+                columns = {key: [row[key] for row in rows] for key in keys}
+                if result == 'columns':
+                    return columns
+                return self._to_numpy(
+                    columns, 
+                    {key: self.columns[self._split_column(key)[1]].type for key in keys}
+                )
+        if not result == 'rows':
+            # columnar results bypass the row cache
+            try:
+                rows = await self.database.get(query, values=values, tables=tables)
+            except Exception as e:
+                self.log.exception(f"Exception while selecting data in {self.name} ")
+                raise e
+            columns, col_types = decode_columns(rows if not rows == None else [])
+            return columns if result == 'columns' else self._to_numpy(columns, col_types)
+
+        if (not 'join' in kw and not 'offset' in kw and not 'after' in kw 
+            and not kw.get('limit') == 0):
+            # join / paginated statements cannot return cached rows
+            cached_rows = self.__select_cached(kw, selection, col_select)
+            if cached_rows is not None:
+                return cached_rows
+
+        writes = self.database.table_writes.get(self.name, 0)
+        try:
+            rows = await self.database.get(query, values=values, tables=tables)
         except Exception as e:
             self.log.exception(f"Exception while selecting data in {self.name} ")
             raise e
-            #cache_new_rows = False
-            #rows = []
-
-        #dictonarify each row result and return
-        to_return = []
-        if not rows == None:
-            for row in rows:
-                if self.database.row_return_type is tuple:
-                    r_dict = {}
-                    for i,v in enumerate(row):
-                        try:
-                            if not v == None and col_refs[keys[i]].type == str and '{"' and '}' in v:
-                                r_dict[keys[i]] = json.loads(v)
-                            else:
-                                r_dict[keys[i]] = v if not col_refs[keys[i]].type == bool else bool(v)
-                        except Exception as e:
-                            self.log.exception(f"error processing results on row {row} index {i} value {v} with {keys}")
-                            assert False
-                    to_return.append(r_dict)
-                if self.database.row_return_type is dict:
-                    r_dict = {}
-                    for column, value in dict(row).items():
-                        if not value == None and col_refs[column].type == str and '{"' and '}' in value:
-                            r_dict[column] = json.loads(value)
-                        else:
-                            r_dict[column] = value if not col_refs[column].type == bool else bool(value)
 
-                    to_return.append(r_dict)
+        to_return = decode(rows) if not rows == None else []
+        if not to_return and self.cache_enabled:
+            missing_key = self.__missing_key(kw)
+            # a write during the read may have inserted the key
+            if missing_key is not None and writes == self.database.table_writes.get(self.name, 0):
+                self.missing_keys[missing_key] = True
         if cache_new_rows and self.cache_enabled:
             for row in to_return:
                 value_to_cache = row[self.prim_key]
                 self.cache[value_to_cache] = row
         return to_return
-    async def insert(self, **kw):
+    async def select_iter(
+        self, selection, *args, batch_size: int = 1000, timeout: Optional[float] = None, **kw
+    ):
+        """
+        Usage: async generator of row dictionaries, rows are streamed from
+        the database batch_size rows at a time, rather than loaded at once,
+        timeout - seconds to wait for each batch
+            async for row in tb.select_iter('*', where={'trans': 'BUY'}):
+                print(row)
+        """
+        query, values, decode, _, col_select, cache_new_rows, _ = self.__compiled_select(
+            selection, args, kw
+        )
+        if self.resident_rows is not None and not 'join' in kw:
+            rows = self.__select_resident(kw, col_select)
+            if rows is not None:
+                for row in rows:
+                    yield row
+                return
+        async for rows in self.database.get_iter(query, values=values, batch_size=batch_size, timeout=timeout):
+            for row in decode(rows):
+                yield row
+    async def __write(self, action, write, wait, write_input, timeout=None):
+        """
+        awaits write, or queues it via Database.submit_write if wait is
+        False or write_mode is async & wait is None, writes within a 
+        transaction are always awaited
+        """
+        write = self.__cancellable_write(
+            self.database.with_timeout(write, timeout, f"{action} on {self.name}")
+        )
+        if wait is None:
+            wait = self.write_mode == 'sync'
+        if wait or self.database.active_transaction() is not None:
+            return await write
+        await self.database.submit_write(
+            write, {'table': self.name, 'action': action, 'input': write_input}
+        )
+    async def __cancellable_write(self, write):
+        """
+        a write cancelled or timed out may have completed, so cached 
+        rows are discarded
+        """
+        try:
+            return await write
+        except (asyncio.CancelledError, QueryTimeoutError):
+            if self.cache_enabled:
+                self.cache.clear()
+                self.missing_keys.clear()
+            if self.resident_rows is not None:
+                self.database.loop.create_task(self.load_resident())
+            raise
+    async def insert(self, _wait: Optional[bool] = None, _timeout: Optional[float] = None, **kw):
         """
         Usage:
             db.tables['stocks_new_tb2'].insert(
@@ -403,9 +1116,28 @@ class Table:
                 symbol='RHAT', 
                 qty=100.0,
                 price=35.14)
+        _wait=False returns once the write is queued, see write_mode,
+        _timeout - seconds to wait before raising QueryTimeoutError.
+        Options are prefixed with _ as keywords are column values
+        """
+        return await self.__write('insert', self.__insert(kw), _wait, kw, _timeout)
+    async def upsert(self, _wait: Optional[bool] = None, _timeout: Optional[float] = None, **kw):
+        """
+        Usage:
+            db.tables['stocks'].upsert(
+                order_num=1,
+                symbol='NTAP',
+                qty=100
+            )
+        inserts row or updates the provided columns of an existing row
+        with the same primary key, in a single query
         """
+        return await self.__write('upsert', self.__insert(kw, upsert=True), _wait, kw, _timeout)
+    async def __insert(self, kw, upsert=False):
         cols = '('
         vals = '('
+        values = []
+        insert_cols = []
         #checking input kw's for correct value types
         add_to_cache = False
         
@@ -428,84 +1160,191 @@ class Table:
                 cols = f'{cols}, '
                 vals = f'{vals}, '
             cols = f'{cols}{col_name}'
-            #json handling
-            if kw[col_name]== 'NULL' or kw[col_name] == None or col.type == str and '{"' and '}' in kw[col_name]:
-                new_val = kw[col_name]
-            else:
-                #new_val = kw[col_name] if col.type is not str else f'"{kw[col_name]}"'
-                new_val = kw[col_name] if not col.type is str else f"'{kw[col_name]}'"
-            vals = f'{vals}{new_val}'
+            vals = f'{vals}{self._bind_value(values, kw[col_name])}'
+            insert_cols.append(col_name)
 
         cols = cols + ')'
         vals = vals + ')'
 
         query = f'INSERT INTO {self.name} {cols} VALUES {vals}'
+        if upsert:
+            query = f'{query} {self.database.get_upsert_clause(self, insert_cols)}'
         #self.log.debug(query)
         try:
-            result = await self.database.run(query)
-            if add_to_cache and self.cache_enabled:
-                self.log.debug("## cache add - from insertion ##")
-                self.cache[kw[self.prim_key]] = insert_values
-                
+            result = await self.database.run(query, values=values, tables=(self.name,))
+            if self.cache_enabled:
+                self.__cache_inserted_row(kw.get(self.prim_key), insert_values, add_to_cache, upsert)
+            if self.resident_rows is not None:
+                await self.__reload_resident(
+                    [kw[self.prim_key]] if kw.get(self.prim_key) is not None else None
+                )
+
         except Exception as e:
             self.log.exception(f"exception inserting into {self.name}")
             raise e
-    async def set_item(self, key, values):
-        async def set_item_coro():
-            if not await self[key] == None:
-                if not isinstance(values, dict) and len(self.columns.keys()) == 2:
-                    return await self.update(**{self.__get_val_column(): values}, where={self.prim_key: key})
-                return await self.update(**values, where={self.prim_key: key})
-            if not isinstance(values, dict) and len(self.columns.keys()) == 2:
-                return await self.insert(**{self.prim_key: key, self.__get_val_column(): values})
-            if len(self.columns.keys()) == 2 and isinstance(values, dict) and not self.prim_key in values:
-                return await self.insert(**{self.prim_key: key, self.__get_val_column(): values})
-            if len(values) == len(self.columns):
-                return await self.insert(**values)
-        return await set_item_coro()
+    def __cache_inserted_row(self, prim_key, row, complete_row, upsert=False):
+        """
+        adds complete rows to cache, upserted rows already in cache 
+        are updated in place, generated primary keys clear all 
+        known missing keys
+        """
+        if prim_key is None:
+            self.missing_keys.clear()
+        else:
+            del self.missing_keys[prim_key]
+        if upsert and prim_key in self.cache:
+            self.log.debug("## cache update - from upsert ##")
+            self.cache.update_row(prim_key, row)
+            return
+        if complete_row:
+            self.log.debug("## cache add - from insertion ##")
+            self.cache[prim_key] = row
+    async def insert_many(
+        self, rows: list, chunk_size: int = 1000, wait: Optional[bool] = None, timeout: Optional[float] = None
+    ):
+        """
+        Usage:
+            await db.tables['stocks'].insert_many(
+                [
+                    {'date': '2006-01-05', 'symbol': 'RHAT', 'qty': 100, 'price': 35.14},
+                    {'date': '2006-01-06', 'symbol': 'NTAP', 'qty': 50, 'price': 28.02}
+                ],
+                chunk_size=1000
+            )
+        all rows must provide the same columns, rows are sent & committed
+        once per chunk via executemany (sqlite / mysql) or COPY (postgres)
+        """
+        return await self.__write('insert_many', self.__insert_many(rows, chunk_size), wait, rows, timeout)
+    async def upsert_many(
+        self, rows: list, chunk_size: int = 1000, wait: Optional[bool] = None, timeout: Optional[float] = None
+    ):
+        """
+        Usage:
+            await db.tables['stocks'].upsert_many(
+                [
+                    {'order_num': 1, 'symbol': 'RHAT', 'qty': 100},
+                    {'order_num': 2, 'symbol': 'NTAP', 'qty': 50}
+                ],
+                chunk_size=1000
+            )
+        bulk form of upsert, all rows must provide the same columns
+        """
+        return await self.__write('upsert_many', self.__insert_many(rows, chunk_size, upsert=True), wait, rows, timeout)
+    async def __insert_many(self, rows, chunk_size, upsert=False):
+        if not rows:
+            return
+        if chunk_size < 1:
+            raise InvalidInputError(chunk_size, "chunk_size must be greater than 0")
+
+        # column set is validated once for all rows
+        columns = [col_name for col_name in self.columns if col_name in rows[0]]
+        column_set = set(rows[0])
+        if not len(columns) == len(column_set):
+            invalid = column_set - set(columns)
+            raise InvalidInputError(
+                f"{invalid} are not valid columns in table {self.name}",
+                f"valid columns {list(self.columns)}"
+            )
+        for col_name, col in self.columns.items():
+            if not col_name in column_set and not col.mods == None:
+                if 'NOT NULL' in col.mods and not 'INCREMENT' in col.mods:
+                    raise InvalidInputError(f'{col_name} is a required field for INSERT in table {self.name}', "correct and try again")
+        add_to_cache = len(columns) == len(self.columns)
+
+        query = 'INSERT INTO {name} ({cols}) VALUES ({vals})'.format(
+            name=self.name,
+            cols=', '.join(columns),
+            vals=', '.join(
+                [self.database.param_placeholder(i+1) for i in range(len(columns))]
+            )
+        )
+        if upsert:
+            query = f'{query} {self.database.get_upsert_clause(self, columns)}'
+        for chunk_start in range(0, len(rows), chunk_size):
+            chunk = rows[chunk_start:chunk_start + chunk_size]
+            chunk_values = []
+            for row in chunk:
+                if not len(row) == len(column_set) or not column_set.issuperset(row):
+                    raise InvalidInputError(
+                        f"row {row} columns do not match {columns}",
+                        "all rows within insert_many must provide the same columns"
+                    )
+                row_values = self.database._validate_where_input([self], dict(row))
+                chunk_values.append(tuple(row_values.get(col_name) for col_name in columns))
+            try:
+                await self.database.run(
+                    query,
+                    values=BulkValues(self.name, columns, chunk_values, upsert),
+                    tables=(self.name,)
+                )
+            except Exception as e:
+                self.log.exception(f"exception inserting rows into {self.name}")
+                raise e
+            if self.cache_enabled and not self.prim_key in column_set:
+                self.missing_keys.clear()
+            if self.cache_enabled and self.prim_key in column_set:
+                prim_key_index = columns.index(self.prim_key)
+                for row, row_values in zip(chunk, chunk_values):
+                    self.__cache_inserted_row(
+                        row_values[prim_key_index], dict(row), add_to_cache, upsert
+                    )
+            if self.resident_rows is not None:
+                await self.__reload_resident(
+                    [row_values[columns.index(self.prim_key)] for row_values in chunk_values]
+                    if self.prim_key in column_set else None
+                )
+    def __set_item_values(self, key, values):
+        """
+        returns row to upsert for set_item / __setitem__
+        """
+        if not isinstance(values, dict) and len(self.columns.keys()) == 2:
+            return {self.prim_key: key, self.__get_val_column(): values}
+        if len(self.columns.keys()) == 2 and isinstance(values, dict) and not self.prim_key in values:
+            return {self.prim_key: key, self.__get_val_column(): values}
+        return {**values, self.prim_key: key}
+    async def set_item(self, key, values, timeout: Optional[float] = None):
+        return await self.upsert(_timeout=timeout, **self.__set_item_values(key, values))
 
     async def modify_cache(self, action, where_kw, updated_data=None):
         """ 
         called for updates  or deletions
             action: 'update'|'delete'
             where_kw: {'where': {'column1': 'value'}}
+        rows are found via the primary key, cache_indexes columns or a
+        scan of cached rows, in that order
         """
         if 'where' in where_kw and isinstance(where_kw['where'], dict):
             self.log.debug(f"modify_cache {action} called with {where_kw} and {updated_data}")
-            cache_to_modify = {}
-            rows_to_check = []
-            if self.prim_key in where_kw['where']:
-                prim_key = where_kw['where'][self.prim_key]
-                if prim_key in self.cache:
-                    row = self.cache[prim_key]
-                    cache_to_modify[prim_key] = row
-                    rows_to_check.append(row)
-                    where_kw['where'].pop(self.prim_key)
-                else:
-                    return
-                for column, value in where_kw['where'].items():
-                    if not cache_to_modify[prim_key][column] == value:
-                        return # No cache to modify matching value
-            else: # No Table Primary key used in where_kw['where']
-                for column, value in where_kw['where'].items():
-                    for cache, row in self.cache:
-                        if row[column] == value and not cache in cache_to_modify:
-                            rows_to_check.append(row)
-                            cache_to_modify[cache] = row
-                for column, value in where_kw['where'].items():
-                    for row in rows_to_check:
-                        if not row[column] == value:
-                            cache_to_modify.pop(row[self.prim_key])
+            where = where_kw['where']
+            if self.prim_key in where:
+                cache_keys = {where[self.prim_key]}
+            else:
+                indexed = [
+                    column for column in where 
+                    if column in self.cache.indexes and isinstance(where[column], Hashable)
+                ]
+                if indexed:
+                    cache_keys = set.intersection(
+                        *[self.cache.lookup(column, where[column]) for column in indexed]
+                    )
+                else: # No Table Primary key or indexed column used in where
+                    cache_keys = {cache for cache, _ in self.cache}
+            cache_to_modify = []
+            for cache in cache_keys:
+                if not cache in self.cache:
+                    continue
+                row = self.cache.cache[cache].row
+                if all(row.get(column) == value for column, value in where.items()):
+                    cache_to_modify.append(cache)
             # All cache rows to modify now ready 
             for cache in cache_to_modify:
                 if action == 'update':
-                    for c, v in updated_data.items():
-                        self.cache[cache][c] = v
-                        self.log.debug(f"## {self.name} cache updated ##")
+                    self.cache.update_row(cache, updated_data)
+                    self.log.debug(f"## {self.name} cache updated ##")
                 if action == 'delete':
                     del self.cache[cache]
                     self.log.debug(f"## {self.name} cache deleted ##")
-    async def update(self, where: dict, **kw):
+    async def update(self, where: dict, _wait: Optional[bool] = None, _timeout: Optional[float] = None, **kw):
         """
         Usage:
             db.tables['stocks'].update(
@@ -516,6 +1355,8 @@ class Table:
                     }
             )
         """
+        return await self.__write('update', self.__update(where, kw), _wait, {'where': where, **kw}, _timeout)
+    async def __update(self, where, kw):
         where_kw = {'where': {}}
         where_kw['where'].update(where)
 
@@ -529,46 +1370,63 @@ class Table:
 
         kw = self._process_input(kw)
 
-        cols_to_set = ''
-        for col_name, col_val in kw.items():
-            if col_name.lower() == 'where':
-                continue
-            if len(cols_to_set) > 1:
-                cols_to_set = f'{cols_to_set}, '
-            #JSON detection
-            if col_val == 'NULL' or self.columns[col_name].type == str and '{"' and '}' in col_val:
-                column_value = col_val
-            else:
-                column_value = col_val if self.columns[col_name].type is not str else f"'{col_val}'"
-            cols_to_set = f'{cols_to_set}{col_name} = {column_value}'
+        set_columns = [col_name for col_name in kw if not col_name.lower() == 'where']
+        values = [kw[col_name] for col_name in set_columns]
+        try:
+            where_shape = self.__where_values(kw['where'], values)
+            key = ('update', tuple(set_columns), where_shape) if where_shape is not None else None
+        except Exception:
+            key = None
 
-        # process where selection for db query
-        where_sel = self.__where(kw)
+        def compile_update():
+            cols_to_set = ''
+            compiled_values = []
+            for col_name in set_columns:
+                if len(cols_to_set) > 1:
+                    cols_to_set = f'{cols_to_set}, '
+                cols_to_set = f'{cols_to_set}{col_name} = {self._bind_value(compiled_values, kw[col_name])}'
 
-        query = 'UPDATE {name} SET {cols_vals} {where}'.format(
-            name=self.name,
-            cols_vals=cols_to_set,
-            where=where_sel
-        )
+            # process where selection for db query
+            where_sel = self.__where(kw, compiled_values)
+
+            query = 'UPDATE {name} SET {cols_vals} {where}'.format(
+                name=self.name,
+                cols_vals=cols_to_set,
+                where=where_sel
+            )
+            return query, compiled_values
+        query, values = self.__compiled_query(key, values, compile_update)
 
+        # resident rows to reload, all rows if primary keys are updated
+        resident_keys = (
+            self.__resident_keys(kw['where']) 
+            if self.resident_rows is not None and not self.prim_key in set_columns 
+            else None
+        )
         try:
             # run db query 
-            result = await self.database.run(query)
+            result = await self.database.run(query, values=values, tables=(self.name,))
 
             # update cache values if enabled
             if self.cache_enabled:
                 await self.modify_cache('update', where_kw, set_kw)
+                if self.prim_key in set_columns:
+                    del self.missing_keys[kw[self.prim_key]]
+            if self.resident_rows is not None:
+                await self.__reload_resident(resident_keys)
             return result
         except Exception as e:
             self.log.exception(f"Exception updating row for {self.name}")
             raise e
 
-    async def delete(self, where: dict, **kw):
+    async def delete(self, where: dict, wait: Optional[bool] = None, timeout: Optional[float] = None, **kw):
         """
         Usage:
             db.tables['stocks'].delete(where={'order_num': 1})
             db.tables['stocks'].delete(all_rows=True)
         """
+        return await self.__write('delete', self.__delete(where, kw), wait, {'where': where, **kw}, timeout)
+    async def __delete(self, where, kw):
 
         # create a copy of where selection for cache usage
         del_where_sel = {}
@@ -577,45 +1435,193 @@ class Table:
         # assign where to kw for input verification
         kw['where'] = where
 
+        values = []
         try:
-            where_sel = self.__where(kw)
+            where_shape = self.__where_values(self._process_input(kw)['where'], values)
+            key = ('delete', where_shape) if where_shape is not None else None
+        except Exception:
+            key = None
+
+        def compile_delete():
+            compiled_values = []
+            where_sel = self.__where(kw, compiled_values)
+            query = "DELETE FROM {name} {where}".format(
+                name=self.name,
+                where=where_sel
+            )
+            return query, compiled_values
+        try:
+            query, values = self.__compiled_query(key, values, compile_delete)
         except Exception as e:
             return repr(e)
-        
-        query = "DELETE FROM {name} {where}".format(
-            name=self.name,
-            where=where_sel
+        resident_keys = (
+            self.__resident_keys(kw['where']) if self.resident_rows is not None else None
         )
         try:
-            result = await self.database.run(query)
+            result = await self.database.run(query, values=values, tables=(self.name,))
             if self.cache_enabled:
                 await self.modify_cache('delete', del_where_sel)
+            if self.resident_rows is not None:
+                if resident_keys is None:
+                    await self.load_resident()
+                for key in resident_keys or ():
+                    del self.resident_rows[key]
             return result
         except Exception as e:
             self.log.exception(f"Exception deleting row from {self.name}")
             raise e
 
+    async def warm_cache(
+        self, where=None, limit: Optional[int] = None, batch_size: int = 1000, timeout: Optional[float] = None
+    ):
+        """
+        Usage: preloads rows into the table cache via a streamed select, 
+        returns the number of rows cached
+            await tb.warm_cache(where={'active': True}, limit=10000)
+        """
+        if not self.cache_enabled:
+            raise InvalidInputError(f"warm_cache called on {self.name}", "cache is not enabled for table")
+        if timeout is not None:
+            return await self.database.with_timeout(
+                self.warm_cache(where, limit, batch_size), timeout, f"warm_cache on {self.name}"
+            )
+        kw = {}
+        if where:
+            kw['where'] = where
+        if limit is not None:
+            kw['limit'] = limit
+        count = 0
+        async for row in self.select_iter('*', batch_size=batch_size, **kw):
+            self.cache[row[self.prim_key]] = row
+            count+=1
+        self.log.debug(f"## {self.name} cache warmed with {count} rows ##")
+        return count
+    def schema_fingerprint(self):
+        """
+        returns hash of table name, columns & primary key, used to 
+        validate cache snapshots
+        """
+        schema = repr((
+            self.name,
+            [(col.name, col.type.__name__, f"{col.mods}".upper()) for col in self.columns.values()],
+            self.prim_key
+        ))
+        return hashlib.sha256(schema.encode()).hexdigest()
+    async def data_marker(self):
+        """
+        returns (row count, max primary key) of the table, used to 
+        detect inserts / deletes since a cache snapshot was saved
+        """
+        rows = await self.database.execute(
+            f"SELECT COUNT(*), MAX({self.prim_key}) FROM {self.name}"
+        )
+        return tuple(rows[0]) if rows else ()
+    async def get_many(self, keys: list, chunk_size: int = 1000, timeout: Optional[float] = None):
+        """
+        Usage: returns dict of primary key: row for found keys, rows are
+        read from the table cache when cached, remaining keys are 
+        selected chunk_size keys per query
+            rows = await tb.get_many([1, 2, 3])
+        """
+        if timeout is not None:
+            return await self.database.with_timeout(
+                self.get_many(keys, chunk_size), timeout, f"get_many on {self.name}"
+            )
+        if chunk_size < 1:
+            raise InvalidInputError(chunk_size, "chunk_size must be greater than 0")
+        found, to_select, seen = {}, [], set()
+        for key in keys:
+            key = self._convert_value(self.name, self.prim_key, key)
+            if key in seen:
+                continue
+            seen.add(key)
+            cached_row = self.cache.get(key) if self.cache_enabled else None
+            if cached_row is not None:
+                found[key] = cached_row
+            elif not (self.cache_enabled and self.missing_keys.get(key)):
+                to_select.append(key)
+        for chunk_start in range(0, len(to_select), chunk_size):
+            chunk = to_select[chunk_start:chunk_start + chunk_size]
+            writes = self.database.table_writes.get(self.name, 0)
+            for row in await self.select('*', where=[[self.prim_key, 'in', chunk]]):
+                found[row[self.prim_key]] = row
+            # a write during the read may have inserted missing keys
+            if self.cache_enabled and writes == self.database.table_writes.get(self.name, 0):
+                for key in chunk:
+                    if not key in found:
+                        self.missing_keys[key] = True
+        return found
+    async def __batched_lookup(self, key):
+        """
+        returns row of key, fetched with the other keys looked up 
+        within lookup_batch_window seconds
+        """
+        key = self._convert_value(self.name, self.prim_key, key)
+        cached_row = self.cache.get(key) if self.cache_enabled else None
+        if cached_row is not None:
+            return cached_row
+        if not key in self.pending_lookups:
+            self.pending_lookups[key] = self.database.loop.create_future()
+        future = self.pending_lookups[key]
+        if self.lookup_flush is None:
+            self.lookup_flush = self.database.loop.call_later(
+                self.lookup_batch_window, self.__flush_lookups
+            )
+        # a cancelled caller does not cancel lookups of the same key
+        return await asyncio.shield(future)
+    def __flush_lookups(self):
+        """
+        fetches all pending lookups via get_many & resolves their futures
+        """
+        pending, self.pending_lookups = self.pending_lookups, {}
+        self.lookup_flush = None
+        def resolve(task):
+            for key, future in pending.items():
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result().get(key))
+        task = self.database.loop.create_task(self.get_many(list(pending)))
+        task.add_done_callback(resolve)
     def __get_val_column(self):
         if len(self.columns.keys()) == 2:
             for key in list(self.columns.keys()):
                 if not key == self.prim_key:
                     return key
 
+    async def get_item(self, key_val, timeout: Optional[float] = None):
+        """
+        Usage: returns row of primary key key_val, or the value column 
+        of 2 column tables, None if missing - same as tb[key_val]
+            row = await tb.get_item(1, timeout=2)
+        """
+        if timeout is not None:
+            return await self.database.with_timeout(
+                self.get_item(key_val), timeout, f"get_item on {self.name}"
+            )
+        # lookups within a transaction are not batched with other callers
+        if self.lookup_batch_window is not None and self.database.active_transaction() is None:
+            row = await self.__batched_lookup(key_val)
+            val = [row] if row is not None else []
+        else:
+            val = await self.select('*', where={self.prim_key: key_val})
+        if not val == None and len(val) > 0:
+            if len(self.columns.keys()) == 2:
+                return val[0][self.__get_val_column()] # returns 
+            return val[0]
+        return None
     def __getitem__(self, key_val):
         """
-        returns get_key_in_table() coro if event loop is running 
+        returns get_item() coro if event loop is running 
         otherwise executes in new event loop and returns
         """
-        async def get_key_in_table():
-            val = await self.select('*', where={self.prim_key: key_val})
-            if not val == None and len(val) > 0:
-                if len(self.columns.keys()) == 2:
-                    return val[0][self.__get_val_column()] # returns 
-                return val[0]
-            return None
         if 'closed=False' in str(self.database.loop):
             self.log.debug(f"__getitem__ called with event loop {self.database.loop}")
-            return get_key_in_table()
+            return self.get_item(key_val)
         else:
             self.log.debug(f"__getitem__ called without event loop - {self.database.loop}")
             val = self.database._run_async_tasks(   
@@ -633,25 +1639,11 @@ class Table:
         returns set_item() coro if event loop is running 
         otherwise executes in new event loop and returns
         """
-        async def set_item_coro():
-            if not await self[key] == None:
-                """ UPDATE """
-                if not isinstance(values, dict) and len(self.columns.keys()) == 2:
-                    return await self.update(**{self.__get_val_column(): values}, where={self.prim_key: key})
-                return await self.update(**values, where={self.prim_key: key})
-            """ INSERT - value Dictionary"""
-            if not isinstance(values, dict) and len(self.columns.keys()) == 2:
-                return await self.insert(**{self.prim_key: key, self.__get_val_column(): values})
-            #TODO - Not sure if this one is used
-            if len(self.columns.keys()) == 2 and isinstance(values, dict) and not self.prim_key in values:
-                return await self.insert(**{self.prim_key: key, self.__get_val_column(): values})
-            if len(values) == len(self.columns):
-                return await self.insert(**values)
         if 'running=True' in str(self.database.loop):
             self.log.debug(f"__getitem__ called with running event loop {self.database.loop}")
             error = "unable to use [] bracket syntax inside a running event loop as __setitem__ is not awaitable,  use tb.insert( tb.update("
             raise NotImplementedError(error)
-        return self.database._run_async_tasks(set_item_coro())
+        return self.database._run_async_tasks(self.set_item(key, values))
 
     def __contains__(self, key):
         if self[key] == None:
@@ -667,7 +1659,4 @@ class Table:
             raise NotImplementedError(error)
         return gen()
     def __aiter__(self):
-        async def gen():
-            for row in await self.select('*'):
-                yield row
-        return gen()
\ No newline at end of file
+        return self.select_iter('*')
\ No newline at end of file
@@ -0,0 +1,80 @@
+import uuid
+import asyncio
+from contextvars import ContextVar
+from aiopyql.exceptions import TransactionError
+
+# transaction of the running task, statements of Database.execute are
+# routed to the transaction connection while set
+current_transaction = ContextVar('aiopyql_transaction', default=None)
+
+class Transaction:
+    """
+    Usage:
+        async with db.transaction():
+            await db.tables['orders'].insert(**order)
+            await db.tables['stock'].update(qty=9, where={'item': 'a'})
+
+    statements of all tables issued within the context run on one 
+    processor connection & are committed once on exit, or rolled back 
+    if an exception is raised. The writer lane is held for the duration
+    of the transaction, other writes wait until it completes
+    """
+    def __init__(self, database):
+        self.database = database
+        self.loop = database.loop
+        self.id = str(uuid.uuid1())
+        # statements issued within the transaction - future, query, values
+        self.queue = asyncio.Queue()
+        self.active = False
+        # set by the processor once the connection is released
+        self.closed = False
+        self.ready = None
+        self.token = None
+        # tables written, caches are invalidated once the transaction ends
+        self.tables = set()
+    def __str__(self):
+        return f"{self.database.db_name} transaction {self.id}"
+    async def __aenter__(self):
+        if self.database.active_transaction() is not None:
+            raise TransactionError(self, "nested transactions are not supported")
+        self.ready = self.loop.create_future()
+        await self.database._query_queue.put((self.ready, 'TRANSACTION', self), 'write')
+        try:
+            # resolved once a processor connection is bound to the transaction
+            await self.ready
+        except asyncio.CancelledError:
+            self.queue.put_nowait((self.loop.create_future(), 'ROLLBACK', None))
+            raise
+        self.active = True
+        self.token = current_transaction.set(self)
+        return self
+    async def __aexit__(self, exc_type, exc, tb):
+        current_transaction.reset(self.token)
+        await self.end('ROLLBACK' if exc_type is not None else 'COMMIT')
+        return False
+    async def execute(self, query, values=None):
+        """
+        runs query on the transaction connection, returns rows of 
+        read queries
+        """
+        if not self.active or self.closed:
+            raise TransactionError(self, f"transaction is not active, cannot run {query}")
+        query_future = self.loop.create_future()
+        self.queue.put_nowait((query_future, query, values))
+        return await query_future
+    async def end(self, action):
+        """
+        commits or rolls back the transaction, once, then invalidates 
+        cached results & rows of written tables
+        """
+        if not self.active:
+            return
+        self.active = False
+        try:
+            if self.closed:
+                raise TransactionError(self, f"transaction connection closed before {action}")
+            end_future = self.loop.create_future()
+            self.queue.put_nowait((end_future, action, None))
+            await end_future
+        finally:
+            await self.database.invalidate_tables(self.tables)
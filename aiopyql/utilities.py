@@ -1,5 +1,15 @@
 import re
 from collections import namedtuple
+try:
+    # faster JSON decoding when installed
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+try:
+    # optional, used for select(..., result='numpy')
+    import numpy
+except ImportError:
+    numpy = None
 def flatten(s):
     return re.sub('\n',' ', s)
 def no_blanks(s):
@@ -22,4 +32,7 @@ def inner(s, l='(', r=')'):
     return s[inside['left']+1:inside['right']]
 
 #Used for grouping columns with database class
-TableColumn = namedtuple('col', ['name', 'type', 'mods'])
\ No newline at end of file
+TableColumn = namedtuple('col', ['name', 'type', 'mods'])
+#Used for bulk inserts / upserts, rows are bound to a single query template
+BulkValues = namedtuple('BulkValues', ['table', 'columns', 'rows', 'upsert'], defaults=[False])
+
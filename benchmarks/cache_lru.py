@@ -0,0 +1,130 @@
+"""
+Purpose:
+Measures per-operation cost, in nanoseconds, of cache hits, misses &
+evicting inserts, for the legacy time.time() keyed cache vs the
+OrderedDict LRU Cache, as well as memory growth of each cache across
+count hits on a full cache
+
+Usage:
+    python benchmarks/cache_lru.py [count]
+"""
+import os
+import sys
+import time
+import logging
+import tracemalloc
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiopyql.cache import Cache
+
+class LegacyCache:
+    """
+    before: entries keyed on time.time(), access_history grows on every hit
+    """
+    def __init__(self, parent, **kw):
+        self.parent = parent
+        self.cache = {}
+        self.log = self.parent.log
+        self.timestamp_to_cache = {}
+        self.access_history = deque()
+        self.max_len = self.parent.max_cache_len
+    def check_max_len_and_clear(self):
+        if len(self.timestamp_to_cache) >= self.max_len:
+            while len(self.timestamp_to_cache) >= self.max_len:
+                cache_time = self.access_history.popleft()
+                if cache_time in self.timestamp_to_cache:
+                    _, cache_key = self.timestamp_to_cache[cache_time]
+                    del self.timestamp_to_cache[cache_time]
+                    if cache_key in self.cache and not self.cache[cache_key] == cache_time:
+                        continue
+                    del self.cache[cache_key]
+                    self.log.debug(f"# {self.parent} cach_key '{cache_key}' cleared due to cache length of {self.max_len} exceeded")
+    def update_timestamp(self, cached_key):
+        if cached_key in self:
+            old_time = self.cache[cached_key]
+            new_time = time.time()
+            self.timestamp_to_cache[new_time] = self.timestamp_to_cache[old_time]
+            del self.timestamp_to_cache[old_time]
+            self.cache[cached_key] = new_time
+            self.access_history.append(new_time)
+    def __getitem__(self, cached_key):
+        if cached_key in self:
+            cache_time = self.cache[cached_key]
+            if cache_time in self.timestamp_to_cache:
+                cache_row = self.timestamp_to_cache[cache_time][0]
+                self.update_timestamp(cached_key)
+                return cache_row
+        return None
+    def __setitem__(self, cached_key, row):
+        cache_time = time.time()
+        if cached_key in self.cache:
+            old_cache_time = self.cache[cached_key]
+            del self.timestamp_to_cache[old_cache_time]
+        self.cache[cached_key] = cache_time
+        self.timestamp_to_cache[cache_time] = (row, cached_key)
+        self.access_history.append(cache_time)
+        self.check_max_len_and_clear()
+    def __contains__(self, cached_key):
+        return cached_key in self.cache
+
+class Parent:
+    log = logging.getLogger('benchmark')
+    max_cache_len = 125
+    max_cache_bytes = None
+    cache_ttl = None
+    cache_policy = 'lru'
+    def __str__(self):
+        return 'benchmark'
+
+ROW = {'id': 1, 'name': 'employee1', 'position_id': 100101}
+
+def full_cache(cache_type):
+    cache = cache_type(Parent())
+    for key in range(Parent.max_cache_len - 1):
+        cache[key] = ROW
+    return cache
+
+def hits(cache, count):
+    keys = Parent.max_cache_len - 1
+    start = time.perf_counter()
+    for i in range(count):
+        cache[i % keys]
+    return time.perf_counter() - start
+
+def misses(cache, count):
+    start = time.perf_counter()
+    for i in range(count):
+        cache[-1]
+    return time.perf_counter() - start
+
+def evictions(cache, count):
+    """
+    each insert of a new key evicts the least recently used key
+    """
+    start = time.perf_counter()
+    for i in range(count):
+        cache[Parent.max_cache_len + i] = ROW
+    return time.perf_counter() - start
+
+def memory_growth(cache_type, count):
+    cache = full_cache(cache_type)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    hits(cache, count)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return after - before
+
+def main(count):
+    for name, cache_type in [('legacy cache', LegacyCache), ('lru cache', Cache)]:
+        for operation in [hits, misses, evictions]:
+            duration = operation(full_cache(cache_type), count)
+            print(f"{name:<14} {operation.__name__:<10} {duration / count * 1_000_000_000:8.1f} ns / op")
+        growth = memory_growth(cache_type, count)
+        print(f"{name:<14} memory growth after {count} hits {growth / 1024 / 1024:8.2f} MiB")
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    main(count)
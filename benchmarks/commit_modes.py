@@ -0,0 +1,61 @@
+"""
+Purpose:
+Measures sqlite write throughput & commit batch size / latency of each 
+commit mode, with count concurrent writers each inserting rows one at 
+a time, a single sequential writer & open arrivals - a new single row 
+insert started every 0.2 ms, regardless of pending commits
+
+Usage:
+    python benchmarks/commit_modes.py [count]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiopyql import data
+
+async def writer(table, start, rows):
+    for i in range(start, start + rows):
+        await table.insert(id=i, name=f'row{i}')
+
+async def open_arrivals(table, rows):
+    inserts = []
+    for i in range(rows):
+        inserts.append(asyncio.create_task(table.insert(id=i, name=f'row{i}')))
+        await asyncio.sleep(0.0002)
+    await asyncio.gather(*inserts)
+
+async def run_mode(commit_mode, writers, rows):
+    db_name = f'benchmark_commit_{commit_mode}_db'
+    db = await data.Database.create(database=db_name, commit_mode=commit_mode)
+    try:
+        await db.create_table('rows', [('id', int), ('name', str)], 'id')
+        table = db.tables['rows']
+        db.commit_stats(reset=True)
+        start = time.perf_counter()
+        if writers is None:
+            await open_arrivals(table, rows)
+        else:
+            await asyncio.gather(*[writer(table, w * rows, rows) for w in range(writers)])
+        duration = time.perf_counter() - start
+        stats = db.commit_stats()
+        p99 = stats['latency']['p99'] * 1000
+        print(
+            f"{commit_mode:<15} {writers or 'open':>4} writers {(writers or 1) * rows / duration:10.0f} rows / s "
+            f"mean batch {stats['batch_size']['mean']:8.1f} p99 latency {p99:6.2f} ms"
+        )
+    finally:
+        await db.close()
+        os.remove(db_name)
+
+async def main(count):
+    for writers in [1, count, None]:
+        for commit_mode in ['max_latency', 'max_batch_size', 'adaptive']:
+            await run_mode(commit_mode, writers, 5000 // (writers or 1))
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    asyncio.run(main(count))
@@ -0,0 +1,85 @@
+"""
+Purpose:
+Measures per-query cost, in microseconds, of building a Table.select
+(query, bind values & row decoding references) and of a complete sqlite
+select, with the compiled query cache enabled vs disabled 
+(max_compiled_queries=0), using a join select with a list where
+
+Usage:
+    python benchmarks/compiled_queries.py [count]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiopyql import data
+
+async def setup_database(db_name):
+    db = await data.Database.create(database=db_name)
+    await db.create_table(
+        'positions',
+        [('id', int, 'UNIQUE'), ('name', str)],
+        'id'
+    )
+    await db.create_table(
+        'employees',
+        [('id', int, 'UNIQUE'), ('name', str), ('position_id', int)],
+        'id',
+        foreign_keys={
+            'position_id': {'table': 'positions', 'ref': 'id', 'mods': ''}
+        }
+    )
+    await db.tables['positions'].insert_many(
+        [{'id': i, 'name': f'position{i}'} for i in range(10)]
+    )
+    await db.tables['employees'].insert_many(
+        [{'id': i, 'name': f'employee{i}', 'position_id': i % 10} for i in range(1000)]
+    )
+    return db
+
+JOIN = {'positions': {'employees.position_id': 'positions.id'}}
+
+def where(i):
+    return [['employees.id', '=', i % 1000], ['positions.name', 'like', 'position*']]
+
+async def build_queries(db, count):
+    """
+    python side query building only - no database round trip
+    """
+    employees = db.tables['employees']
+    start = time.perf_counter()
+    for i in range(count):
+        employees._Table__compiled_select('*', (), {'join': dict(JOIN), 'where': where(i)})
+    return time.perf_counter() - start
+
+async def run_queries(db, count):
+    employees = db.tables['employees']
+    start = time.perf_counter()
+    for i in range(count):
+        await employees.select('*', join=dict(JOIN), where=where(i))
+    return time.perf_counter() - start
+
+async def main(count):
+    db_name = 'benchmark_compiled_db'
+    db = await setup_database(db_name)
+    try:
+        for name, max_compiled in [('cache disabled', 0), ('cache enabled', 128)]:
+            for table in db.tables.values():
+                table.max_compiled_queries = max_compiled
+                table.clear_compiled_queries()
+            # warm up
+            await run_queries(db, 100)
+            build_duration = await build_queries(db, count)
+            select_duration = await run_queries(db, count)
+            print(f"{name:<16} build select  {build_duration / count * 1_000_000:8.2f} us / query")
+            print(f"{name:<16} sqlite select {select_duration / count * 1_000_000:8.2f} us / query")
+    finally:
+        await db.close()
+        os.remove(db_name)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(main(count))
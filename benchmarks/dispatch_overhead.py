@@ -0,0 +1,107 @@
+"""
+Purpose:
+Measures per-query dispatch overhead, in microseconds, of the legacy
+uuid1 + asyncio.Queue(1) result path vs the asyncio.Future result path
+used by Database.execute, as well as a complete sqlite key lookup 
+
+Usage:
+    python benchmarks/dispatch_overhead.py [count]
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiopyql import data
+
+async def legacy_dispatch(count):
+    """
+    before: query id & result queue created per query
+    """
+    query_queue = asyncio.Queue()
+    queue_results = {}
+
+    async def processor():
+        while True:
+            query_id, query = await query_queue.get()
+            if query_id == 'EXITING':
+                break
+            await queue_results[query_id].put([])
+
+    async def execute(query):
+        query_id = str(uuid.uuid1())
+        queue_results[query_id] = asyncio.Queue(1)
+        await query_queue.put((query_id, query))
+        result = await queue_results[query_id].get()
+        del queue_results[query_id]
+        return result
+
+    task = asyncio.create_task(processor())
+    start = time.perf_counter()
+    for _ in range(count):
+        await execute('SELECT 1')
+    duration = time.perf_counter() - start
+    await query_queue.put(('EXITING', None))
+    await task
+    return duration
+
+async def future_dispatch(count):
+    """
+    after: a future is carried with the query in the queue item
+    """
+    loop = asyncio.get_running_loop()
+    query_queue = asyncio.Queue()
+
+    async def processor():
+        while True:
+            query_future, query = await query_queue.get()
+            if query_future == 'EXITING':
+                break
+            data.Database.set_query_result(query_future, [])
+
+    async def execute(query):
+        query_future = loop.create_future()
+        await query_queue.put((query_future, query))
+        return await query_future
+
+    task = asyncio.create_task(processor())
+    start = time.perf_counter()
+    for _ in range(count):
+        await execute('SELECT 1')
+    duration = time.perf_counter() - start
+    await query_queue.put(('EXITING', None))
+    await task
+    return duration
+
+async def sqlite_key_lookups(count):
+    db_name = 'benchmark_dispatch_db'
+    db = await data.Database.create(database=db_name)
+    await db.create_table(
+        'keystore',
+        [('env', str, 'UNIQUE NOT NULL'), ('val', str)],
+        'env'
+    )
+    await db.tables['keystore'].insert(env='key1', val='value1')
+    start = time.perf_counter()
+    for _ in range(count):
+        await db.get("SELECT * FROM keystore WHERE env='key1'")
+    duration = time.perf_counter() - start
+    await db.close()
+    os.remove(db_name)
+    return duration
+
+async def main(count):
+    for name, bench in [
+        ('legacy uuid1 + Queue(1) dispatch', legacy_dispatch),
+        ('future dispatch', future_dispatch),
+        ('sqlite key lookup - Database.get', sqlite_key_lookups),
+    ]:
+        duration = await bench(count)
+        print(f"{name:<36} {duration / count * 1_000_000:8.2f} us / query")
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    asyncio.run(main(count))
@@ -0,0 +1,59 @@
+"""
+Purpose:
+Measures latency of a primary key select submitted behind a burst of 
+count single row inserts, with reads served from the read priority lane
+vs queued FIFO behind the writes (submitted at write priority), using a
+single sqlite queue processor. The time to commit the burst is shown, as
+a read served mid burst first commits the writes already executed
+
+Usage:
+    python benchmarks/priority_lanes.py [count]
+"""
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiopyql import data
+from aiopyql.lanes import query_priority
+
+async def timed_read(table, priority):
+    if priority is not None:
+        query_priority.set(priority)
+    start = time.perf_counter()
+    await table.select('*', where={'id': 1})
+    return time.perf_counter() - start
+
+async def main(count):
+    db_name = 'benchmark_lanes_db'
+    db = await data.Database.create(database=db_name)
+    try:
+        await db.create_table('rows', [('id', int), ('name', str)], 'id')
+        table = db.tables['rows']
+        await table.insert(id=1, name='row1')
+        offset = 2
+        for name, priority in [('fifo', 'write'), ('read lane', None)]:
+            writes = [
+                asyncio.create_task(table.insert(id=i, name=f'row{i}')) 
+                for i in range(offset, offset + count)
+            ]
+            offset += count
+            # writes are queued before the read
+            await asyncio.sleep(0)
+            start = time.perf_counter()
+            read = asyncio.create_task(timed_read(table, priority))
+            await asyncio.gather(*writes)
+            burst = time.perf_counter() - start
+            print(
+                f"{name:<10} pk select behind {count} writes {await read * 1000:8.2f} ms "
+                f"burst committed in {burst * 1000:8.2f} ms"
+            )
+    finally:
+        await db.close()
+        os.remove(db_name)
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    asyncio.run(main(count))
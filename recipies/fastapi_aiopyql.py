@@ -23,17 +23,9 @@ async def db_setup():
 @app.post("/{table}")
 async def insert_or_update_table(table, data: dict):
     tb = app.data['database'].tables[table]
-    for key, value in data.items():
-        if await tb[key] == None:
-            await tb.insert(
-                key=key,
-                value=value
-            )
-        else:
-            await tb.update(
-                value=value,
-                where={'key': key}
-            )
+    await tb.upsert_many(
+        [{'key': key, 'value': value} for key, value in data.items()]
+    )
 
 @app.get("/{table}")
 async def get_table_items(table: str):
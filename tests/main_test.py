@@ -1,11 +1,13 @@
 import asyncio
-from aiopyql.exceptions import InvalidInputError
+import time
+from aiopyql.exceptions import InvalidInputError, QueueFullError, QueryTimeoutError
+from aiopyql.lanes import LaneQueue
 
 async def async_test(db):
     db = await db
     import random
     try:
-        for table in ['employees', 'positions', 'departments', 'keystore', 'stocks']:
+        for table in ['employees', 'positions', 'departments', 'keystore', 'stocks', 'documents', 'roles', 'selections', 'options']:
             if table in db.tables:
                 await db.remove_table(table)
     except Exception as e:
@@ -222,6 +224,73 @@ async def async_test(db):
             db.tables['employees'].insert(**employee)
         )
     await asyncio.gather(*new_employees)
+    sel = await db.tables['employees'].select('id')
+    assert len(sel) == len(employees), f"expected {len(employees)} employees, found {len(sel)}"
+
+    # bulk insert - chunk_size smaller than len(rows) to commit multiple chunks
+    bulk_rows = [{'env': f'bulk_env{i}', 'val': str(i)} for i in range(25)]
+    await db.tables['keystore'].insert_many(bulk_rows, chunk_size=10)
+    sel = await db.tables['keystore'].select('*', where=[['env', 'like', 'bulk_env*']])
+    assert len(sel) == len(bulk_rows), f"expected {len(bulk_rows)} bulk rows, found {len(sel)}"
+    await db.tables['keystore'].delete(where=[['env', 'like', 'bulk_env*']])
+
+    # streamed select - batch_size smaller than len(employees)
+    streamed = [row async for row in db.tables['employees'].select_iter('*', batch_size=7)]
+    assert len(streamed) == len(employees), f"expected {len(employees)} streamed employees, found {len(streamed)}"
+    async for row in db.tables['employees']:
+        break
+    # queries within the loop body do not wait on the stream
+    streamed = 0
+    async for row in db.tables['employees'].select_iter('*', batch_size=5):
+        if streamed < 20:
+            await db.tables['keystore'].upsert(env=f"stream_env{streamed}", val=str(row['id']))
+            assert await db.tables['employees'].select('id', where={'id': row['id']}) == [{'id': row['id']}]
+        streamed += 1
+    assert streamed == len(employees), f"expected {len(employees)} streamed employees, found {streamed}"
+    sel = await db.tables['keystore'].select('*', where=[['env', 'like', 'stream_env*']])
+    assert len(sel) == 20, f"expected 20 writes made while streaming, found {len(sel)}"
+
+    # pagination - limit / offset & keyset pages match a full ordered select
+    ordered = await db.tables['employees'].select('id', orderby='id desc')
+    page = await db.tables['employees'].select('id', orderby='id desc', limit=5, offset=5)
+    assert page == ordered[5:10], f"expected offset page {ordered[5:10]}, found {page}"
+    keyset_pages, after = [], {}
+    while True:
+        page = await db.tables['employees'].select('id', orderby='id desc', limit=7, **after)
+        if not page:
+            break
+        keyset_pages.extend(page)
+        after = {'after': {'id': page[-1]['id']}}
+    assert keyset_pages == ordered, f"keyset pages do not match ordered select"
+
+    # columnar results - match the row results, column by column
+    rows = await db.tables['employees'].select('id', 'name', orderby='id')
+    columns = await db.tables['employees'].select('id', 'name', orderby='id', result='columns')
+    assert columns == {
+        'id': [row['id'] for row in rows], 'name': [row['name'] for row in rows]
+    }, f"columnar results do not match row results"
+    from aiopyql.utilities import numpy
+    if numpy is not None:
+        arrays = await db.tables['employees'].select('id', 'name', orderby='id', result='numpy')
+        assert arrays['id'].dtype == numpy.int64 and arrays['id'].tolist() == columns['id'], f"unexpected id array {arrays['id']}"
+    try:
+        await db.tables['employees'].select('id', result='frame')
+        assert False, "select should have raised with an invalid result"
+    except InvalidInputError:
+        pass
+
+    # compiled queries - repeat call shapes re-use the compiled query
+    compiled = len(db.tables['employees'].compiled_queries)
+    for emp_id in [1001, 1002]:
+        sel = await db.tables['employees'].select('id', where=[['id', '=', emp_id]])
+        assert sel == [{'id': emp_id}], f"expected employee {emp_id}, found {sel}"
+    assert len(db.tables['employees'].compiled_queries) == compiled + 1, "expected a single compiled query"
+
+    try:
+        await db.tables['employees'].insert_many([{'id': 9999, 'name': 'a'}, {'id': 9998}])
+        assert False, "insert_many should have raised with mismatched row columns"
+    except InvalidInputError:
+        pass
     # Select Data
 
     # join selects
@@ -485,7 +554,12 @@ async def async_test(db):
     # * select NULL check # 
     sel = await db.tables['stocks'].select('*', where={'qty': 101, 'symbol': None})
     print(sel)
-    assert len(sel) > 0, "we should find at least 1 row with a NULL symbol" 
+    assert len(sel) > 0, "we should find at least 1 row with a NULL symbol"
+
+    # bind parameters - quoted values are sent without escaping
+    await db.tables['keystore'].insert(env="o'reilly", val='it\'s "quoted"')
+    sel = await db.tables['keystore'].select('val', where=[['env', 'like', "o'rei*"]])
+    assert len(sel) == 1 and sel[0]['val'] == 'it\'s "quoted"', f"expected quoted value, found {sel}"
 
 
     # Delete Data 
@@ -507,6 +581,375 @@ async def async_test(db):
     print(sel)
     assert sel['trans']['type'] == 'SELL' and sel['symbol'] == 'NFLX', f"values not correctly updated"
 
+    # set_item of a missing key inserts a row of the provided columns
+    await db.tables['stocks'].set_item(9999, {'symbol': 'PART', 'qty': 1})
+    sel = await db.tables['stocks'].select('*', where={'order_num': 9999})
+    assert len(sel) == 1 and sel[0]['symbol'] == 'PART' and sel[0]['price'] is None, f"expected partial row, found {sel}"
+    await db.tables['stocks'].delete(where={'order_num': 9999})
+
+    # str columns are returned as stored when decode_json_str is disabled
+    db.decode_json_str = False
+    db.tables['stocks'].clear_compiled_queries()
+    if db.tables['stocks'].cache_enabled:
+        await db.tables['stocks'].invalidate_cache()
+    sel = await db.tables['stocks'].select('trans', where={'order_num': 2})
+    assert isinstance(sel[0]['trans'], str), f"expected dumped JSON str, found {sel}"
+    db.decode_json_str = True
+    db.tables['stocks'].clear_compiled_queries()
+    sel = await db.tables['stocks'].select('trans', where={'order_num': 2})
+    assert sel[0]['trans']['type'] == 'SELL', f"expected decoded JSON, found {sel}"
+
+    # negative cache - missing keys are cached until inserted
+    assert await db.tables['keystore']['missing_env'] is None
+    assert 'missing_env' in db.tables['keystore'].missing_keys, "expected missing key to be cached"
+    assert await db.tables['keystore']['missing_env'] is None
+    await db.tables['keystore'].insert(env='missing_env', val='found')
+    assert not 'missing_env' in db.tables['keystore'].missing_keys
+    assert await db.tables['keystore']['missing_env'] == 'found', "expected inserted key after negative cache"
+
+    # negative cache - a key inserted while its read is in flight is not cached as missing
+    get = db.get
+    async def racing_get(query, commit=False, *, values=None, **kw):
+        rows = await get(query, commit, values=values, **kw)
+        if values and 'race_env' in values:
+            db.get = get
+            await db.tables['keystore'].insert(env='race_env', val='x')
+        return rows
+    db.get = racing_get
+    assert await db.tables['keystore']['race_env'] is None, "expected read started before insert"
+    db.get = get
+    assert not 'race_env' in db.tables['keystore'].missing_keys, "expected key inserted during read not cached as missing"
+    assert await db.tables['keystore']['race_env'] == 'x'
+
+    # cache warmup & snapshots - restored rows are served from cache
+    keystore = db.tables['keystore']
+    keystore.cache.clear()
+    warmed = await keystore.warm_cache(where=[['env', 'like', 'missing*']], limit=10)
+    assert warmed == 1 and 'missing_env' in keystore.cache, f"expected warmed row, found {warmed}"
+    # snapshots are JSON, bytes & nested values are restored as saved
+    keystore.cache['snapshot_env'] = {'env': 'snapshot_env', 'val': b'\x00\xff', 'nested': {'a': [1, None]}}
+    saved = await db.save_cache_snapshot(f'{db.db_name}_cache.snapshot', data_version=1)
+    assert saved['keystore'] == 2, f"unexpected snapshot {saved}"
+    keystore.cache.clear()
+    assert await db.load_cache_snapshot(f'{db.db_name}_cache.snapshot', data_version=2) == {}
+    restored = await db.load_cache_snapshot(f'{db.db_name}_cache.snapshot', data_version=1)
+    assert restored['keystore'] == 2 and keystore.cache['missing_env']['val'] == 'found', f"unexpected restore {restored}"
+    assert keystore.cache['snapshot_env'] == {'env': 'snapshot_env', 'val': b'\x00\xff', 'nested': {'a': [1, None]}}
+    del keystore.cache['snapshot_env']
+    import os
+    os.remove(f'{db.db_name}_cache.snapshot')
+
+    # cache stats - counters are reset via reset=True
+    stats = db.tables['keystore'].cache_stats(reset=True)
+    assert stats['negative_hits'] >= 1 and stats['hits'] >= 1 and stats['entries'] > 0, f"unexpected stats {stats}"
+    assert db.tables['keystore'].cache_stats()['hits'] == 0, "expected reset cache stats"
+    # in place updates & cache clears count as invalidations
+    await db.tables['keystore'].update(val='updated', where={'env': 'missing_env'})
+    assert db.tables['keystore'].cache_stats()['invalidations'] == 1, f"expected in place update counted"
+    entries = db.tables['keystore'].cache_stats()['entries']
+    await db.tables['keystore'].invalidate_cache()
+    stats = db.tables['keystore'].cache_stats(reset=True)
+    assert stats['invalidations'] == 1 + entries, f"expected cleared entries counted, found {stats}"
+    if db.cache_enabled:
+        await db.get(f"SELECT * FROM keystore WHERE env = {db.param_placeholder(1)}", values=['missing_env'])
+        await db.get(f"SELECT * FROM keystore WHERE env = {db.param_placeholder(1)}", values=['missing_env'])
+        stats = db.cache_stats()
+        assert stats['hits'] >= 1 and stats['misses'] >= 1 and stats['bytes'] > 0, f"unexpected db stats {stats}"
+
+    # upsert - insert new key & update existing key in place
+    await db.tables['keystore'].upsert(env='upsert_env', val='first')
+    await db.tables['keystore'].upsert_many(
+        [{'env': 'upsert_env', 'val': 'second'}, {'env': 'upsert_env2', 'val': 'new'}]
+    )
+    sel = await db.tables['keystore'].select('*', where=[['env', 'like', 'upsert_env*']])
+    assert {row['env']: row['val'] for row in sel} == {'upsert_env': 'second', 'upsert_env2': 'new'}, f"unexpected upsert results {sel}"
+    assert await db.tables['keystore']['upsert_env'] == 'second', "expected cached row to be updated by upsert"
+
+    # JSON (dict) columns - decoded on select, str values are not mistaken for JSON
+    await db.create_table(
+        'documents',
+        [
+            ('doc_id', int, 'UNIQUE NOT NULL'),
+            ('title', str),
+            ('body', dict)
+        ],
+        'doc_id',
+        cache_enabled=True,
+        max_cache_len=2,
+        cache_policy='lfu',
+        cache_indexes=['title']
+    )
+    await db.tables['documents'].insert_many([
+        {'doc_id': 1, 'title': 'braces } only', 'body': {'tags': ['a', 'b'], 'pages': 2}},
+        {'doc_id': 2, 'title': 'empty', 'body': None}
+    ])
+    sel = await db.tables['documents'].select('*', orderby='doc_id')
+    assert sel[0]['body'] == {'tags': ['a', 'b'], 'pages': 2}, f"expected decoded JSON body, found {sel}"
+    assert sel[0]['title'] == 'braces } only' and sel[1]['body'] is None, f"unexpected documents {sel}"
+
+    # cache indexes - non primary key updates find cached rows via the index
+    documents = db.tables['documents']
+    assert documents.cache.lookup('title', 'empty') == {2}, f"expected doc_id 2 indexed by title"
+    await documents.update(title='updated', where={'title': 'empty'})
+    assert documents.cache.lookup('title', 'updated') == {2} and not documents.cache.lookup('title', 'empty')
+    assert (await documents.select('title', where={'doc_id': 2}))[0]['title'] == 'updated'
+
+    # cache policies - lfu evicts the least frequently read row, ttl expires rows
+    for _ in range(2):
+        await documents.select('*', where={'doc_id': 1})
+    await documents.insert(doc_id=3, title='new', body={})
+    assert 1 in documents.cache and not 2 in documents.cache, f"expected lfu to evict doc_id 2"
+    documents.disable_cache()
+    documents.cache_ttl = 0.1
+    documents.enable_cache()
+    documents.cache[1] = sel[0]
+    assert 1 in documents.cache
+    await asyncio.sleep(0.2)
+    assert not 1 in documents.cache, "expected cached row to expire after cache_ttl"
+    documents.disable_cache()
+    documents.cache_ttl, documents.max_cache_bytes = None, 2048
+    documents.enable_cache()
+    for doc_id in range(10):
+        documents.cache[doc_id] = {'doc_id': doc_id, 'title': 'x' * 100}
+    assert documents.cache.size_bytes <= 2048 and 9 in documents.cache, f"expected cache within max_cache_bytes"
+    documents.cache['large'] = ['x' * 4096]
+    assert not 'large' in documents.cache, "expected entry larger than max_cache_bytes to be skipped"
+
+    # resident tables - selects are served from memory, writes go through to the database
+    await db.create_table(
+        'roles',
+        [
+            ('role_id', int, 'UNIQUE NOT NULL'),
+            ('name', str),
+            ('level', int),
+            ('active', bool)
+        ],
+        'role_id',
+        cache_indexes=['level'],
+        resident=True
+    )
+    roles = db.tables['roles']
+    await roles.insert_many([
+        {'role_id': i, 'name': f'role{i}', 'level': i % 3, 'active': i % 2 == 0} for i in range(20)
+    ])
+    await roles.insert(role_id=20, name='admin', level=None, active=True)
+    await roles.update(name='lead', where={'level': 2})
+    await roles.delete(where=[['role_id', '>=', 18], ['role_id', '<', 20]])
+    assert len(roles.resident_rows) == 19, f"expected 19 resident roles, found {len(roles.resident_rows)}"
+    for kw in [
+        {},
+        {'where': {'level': 2}},
+        {'where': [['name', 'like', 'role1*'], ['active', '=', True]], 'orderby': 'role_id desc'},
+        {'where': [['level', 'in', [0, 1]]], 'orderby': ['level desc', 'role_id'], 'limit': 5, 'offset': 2},
+        {'orderby': 'level', 'limit': 3},
+        {'orderby': 'role_id', 'limit': 4, 'after': {'role_id': 5}},
+    ]:
+        resident = await roles.select('*', **kw)
+        # same select from the database
+        resident_rows, roles.resident_rows = roles.resident_rows, None
+        expected = await roles.select('*', **kw)
+        roles.resident_rows = resident_rows
+        if not 'orderby' in kw:
+            resident, expected = [sorted(rows, key=lambda r: r['role_id']) for rows in (resident, expected)]
+        assert resident == expected, f"resident select {kw} {resident} != {expected}"
+    await db.run('UPDATE roles SET name = ? WHERE role_id = 0'.replace('?', db.param_placeholder(1)), values=['direct'])
+    assert (await roles.select('name', where={'role_id': 0}))[0]['name'] == 'role0', "expected select served from resident rows"
+
+    # single-flight - concurrent identical reads share one query
+    executed, execute = [], db.execute
+    async def counted_execute(query, *args, **kw):
+        executed.append(query)
+        return await execute(query, *args, **kw)
+    db.execute = counted_execute
+    query = f"SELECT id FROM employees WHERE id > {db.param_placeholder(1)}"
+    results = await asyncio.gather(*[db.get(query, values=[-12345]) for _ in range(20)])
+    db.execute = execute
+    assert len(executed) == 1, f"expected 1 shared query, found {len(executed)}"
+    assert all(result == results[0] for result in results) and len(results[0]) > 0
+
+    # batched lookups - concurrent table[key] lookups share one query
+    employees = db.tables['employees']
+    emp_ids = [row['id'] for row in await employees.select('id', orderby='id', limit=30)]
+    employees.cache.clear()
+    employees.lookup_batch_window = 0
+    executed.clear()
+    db.execute = counted_execute
+    rows = await asyncio.gather(*[employees[emp_id] for emp_id in emp_ids + [-1]])
+    db.execute = execute
+    employees.lookup_batch_window = None
+    assert [row['id'] for row in rows[:-1]] == emp_ids and rows[-1] is None, f"unexpected batched rows {rows}"
+    assert len(executed) == 1, f"expected 1 batched query, found {len(executed)}"
+    many = await employees.get_many(emp_ids[:5] + [-1])
+    assert list(many) == emp_ids[:5], f"unexpected get_many keys {list(many)}"
+
+    # sqlite uses WAL, so commits are not blocked by reads of other connections
+    if db.type == 'sqlite':
+        journal_mode = await db.get('SELECT * FROM pragma_journal_mode')
+        assert journal_mode[0][0] == 'wal', f"expected WAL journal mode, found {journal_mode}"
+
+    # positional commit of get / execute is kept, values are keyword only
+    assert len(await db.get('SELECT 1', False)) == 1
+    assert len(await db.execute('SELECT 1', False)) == 1
+
+    # statements are routed by their leading keyword, writes to tables &
+    # columns named like 'select' still go to the writer lane & commit
+    await db.create_table(
+        'selections',
+        [
+            ('id', int, 'UNIQUE NOT NULL'),
+            ('selected', bool)
+        ],
+        'id'
+    )
+    await db.tables['selections'].insert(id=1, selected=True)
+    await db.run(f"UPDATE selections SET selected = {db.param_placeholder(1)} WHERE id = 1", values=[False])
+    sel = await db.tables['selections'].select('*')
+    assert sel == [{'id': 1, 'selected': False}], f"expected committed selections row, found {sel}"
+    # writes to tables named like 'select' invalidate cached query results
+    if db.cache_enabled:
+        selections_query = 'SELECT * FROM selections ORDER BY id'
+        assert len(await db.get(selections_query)) == 1
+        await db.run(f"INSERT INTO selections (id, selected) VALUES ({db.param_placeholder(1)}, {db.param_placeholder(2)})", values=[2, True])
+        await db.run(f"UPDATE selections SET selected = {db.param_placeholder(1)} WHERE id = 1", values=[True])
+        sel = await db.get(selections_query)
+        assert len(sel) == 2 and sel[0][1] in {True, 1}, f"expected cached selections invalidated, found {sel}"
+    assert db.is_read_query(" /* report */ WITH s AS (SELECT 1) SELECT * FROM s")
+    assert not db.is_read_query("WITH s AS (SELECT 1) INSERT INTO selections (id) SELECT 2")
+
+    # transactions - statements of all tables commit once, or roll back on error
+    keystore = db.tables['keystore']
+    async with db.transaction():
+        await keystore.insert_many([{'env': f'tx_env{i}', 'val': 'tx'} for i in range(50)])
+        await db.tables['positions'].update(name='tx_position', where={'id': 100101})
+        sel = await keystore.select('*', where=[['env', 'like', 'tx_env*']])
+        assert len(sel) == 50, f"expected uncommitted rows within transaction, found {len(sel)}"
+    sel = await keystore.select('*', where=[['env', 'like', 'tx_env*']])
+    assert len(sel) == 50, f"expected 50 committed rows, found {len(sel)}"
+    position = await db.tables['positions'].select('name', where={'id': 100101})
+    assert position[0]['name'] == 'tx_position', f"expected committed update, found {position}"
+    try:
+        async with db.transaction():
+            await keystore.insert(env='tx_rollback', val='tx')
+            assert await keystore['tx_rollback'] == 'tx'
+            raise ValueError("rollback")
+    except ValueError:
+        pass
+    assert await keystore['tx_rollback'] is None, "expected rolled back insert"
+    assert await keystore.select('*', where={'env': 'tx_rollback'}) == []
+
+    # commit scheduler - concurrent writes are grouped into commit batches
+    for commit_mode in ['max_latency', 'adaptive']:
+        db.commit_scheduler.mode = commit_mode
+        db.commit_stats(reset=True)
+        await asyncio.gather(*[
+            keystore.insert(env=f'{commit_mode}_env{i}', val='c') for i in range(100)
+        ])
+        stats = db.commit_stats()
+        assert stats['writes'] >= 100 and stats['batch_size']['max'] > 1, f"expected grouped commits, found {stats}"
+        assert stats['latency']['p99'] is not None, f"expected commit latency, found {stats}"
+    db.commit_scheduler.mode = 'max_latency'
+
+    # async writes - return once queued, bounded by max_pending_writes
+    write_errors = []
+    db.write_error_callback = lambda error, details: write_errors.append(details)
+    db.pending_write_slots = asyncio.Semaphore(5)
+    for i in range(20):
+        await keystore.insert(env=f'async_env{i}', val='a', _wait=False)
+        assert len(db.pending_writes) <= 5, f"expected at most 5 pending writes, found {len(db.pending_writes)}"
+    await keystore.insert(env='async_env0', val='duplicate', _wait=False)
+    await db.flush()
+    assert not db.pending_writes
+    db.pending_write_slots = asyncio.Semaphore(db.max_pending_writes)
+    db.write_error_callback = None
+    sel = await keystore.select('*', where=[['env', 'like', 'async_env*']])
+    assert len(sel) == 20, f"expected 20 async writes, found {len(sel)}"
+    assert len(write_errors) == 1 and write_errors[0]['action'] == 'insert', f"unexpected write errors {write_errors}"
+
+    # write options are prefixed with _, so columns named like options are written
+    await db.create_table(
+        'options',
+        [
+            ('id', int, 'UNIQUE NOT NULL'),
+            ('wait', str),
+            ('timeout', int)
+        ],
+        'id'
+    )
+    options = db.tables['options']
+    await options.insert(id=1, wait='x', timeout=5, _timeout=5)
+    await options.upsert(id=2, wait='y', timeout=10, _wait=False)
+    await db.flush()
+    await options.update(wait='z', timeout=6, where={'id': 1}, _timeout=5)
+    sel = sorted(await options.select('*', where=[['timeout', '>', 0]]), key=lambda row: row['id'])
+    assert sel == [
+        {'id': 1, 'wait': 'z', 'timeout': 6}, {'id': 2, 'wait': 'y', 'timeout': 10}
+    ], f"expected wait & timeout columns written, found {sel}"
+
+    # priority lanes - reads are served before writes & maintenance, 
+    # lanes are bounded & lower lanes are not starved
+    lanes = LaneQueue(max_depth=20, queue_full='raise', max_skips=4)
+    await lanes.put('write', 'write')
+    await lanes.put('maintenance', 'maintenance')
+    await lanes.put('read', 'read')
+    assert [lanes.get_nowait() for _ in range(3)] == ['read', 'write', 'maintenance']
+    await lanes.put('write', 'write')
+    for i in range(20):
+        await lanes.put(i, 'read')
+    try:
+        await lanes.put(20, 'read')
+        assert False, "expected QueueFullError"
+    except QueueFullError:
+        pass
+    served = [lanes.get_nowait() for _ in range(21)]
+    assert served.index('write') == 4, f"expected write served after 4 reads, found {served}"
+    assert lanes.stats()['read']['rejected'] == 1 and lanes.stats()['read']['peak'] == 20
+    # processors waiting for more writes wake as soon as a query is queued
+    assert await lanes.wait(0.01) is False
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.01, lanes.put_control, 'read')
+    start = time.time()
+    assert await lanes.wait(5) is True and time.time() - start < 1
+    assert lanes.get_nowait() == 'read'
+    stats = db.queue_stats()
+    assert set(stats) == {'read', 'write', 'maintenance'} and stats['write']['peak'] > 0, f"unexpected queue stats {stats}"
+
+    # query timeouts - runaway queries are cancelled in the driver, 
+    # freeing the processor for following queries
+    # mysql runaway queries are stopped via KILL QUERY on a side connection
+    if db.type == 'mysql':
+        runaway = "SELECT SLEEP(30)"
+    else:
+        runaway = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x+1 FROM c) SELECT count(*) FROM c"
+    start = time.time()
+    try:
+        await db.get(runaway, timeout=0.2)
+        assert False, "expected QueryTimeoutError"
+    except QueryTimeoutError:
+        pass
+    sel = await keystore.select('*', where=[['env', 'like', 'async_env*']], timeout=5)
+    assert len(sel) == 20, f"expected select after timeout, found {len(sel)}"
+    assert time.time() - start < 10, f"expected runaway query cancelled in the driver"
+    assert not db.in_flight, f"expected timed out read removed from in-flight reads"
+
+    # timeouts on item access, streamed selects & cache warming
+    await keystore.set_item('timeout_env', 'timeout_val', timeout=5)
+    assert await keystore.get_item('timeout_env', timeout=5) == 'timeout_val'
+    streamed = [
+        row async for row in keystore.select_iter('*', where={'env': 'timeout_env'}, timeout=5)
+    ]
+    assert len(streamed) == 1, f"expected 1 streamed row, found {streamed}"
+    if keystore.cache_enabled:
+        await keystore.warm_cache(where={'env': 'timeout_env'}, timeout=5)
+
+    # db cache dependencies - writes only invalidate cached queries of written tables
+    if db.cache_enabled:
+        cache_key = ('SELECT id FROM employees', ())
+        await db.get(cache_key[0])
+        await db.tables['keystore'].insert(env='dependency_env', val='x')
+        assert cache_key in db.cache, "expected employees query to remain cached after keystore write"
+        await db.tables['employees'].delete(where={'id': -1})
+        assert not cache_key in db.cache, "expected employees query to be invalidated after employees write"
+
     import sys
     
     for table in db.tables:
@@ -28,4 +28,15 @@ class TestData(unittest.TestCase):
         try:
             asyncio.run(load_and_check_database())
         except asyncio.CancelledError:
-            pass
\ No newline at end of file
+            pass
+    def test_run_sqlite_queue_processor_pool_test(self):
+        # 1 writer lane + 2 reader lanes, each with its own connection
+        db = data.Database.create(
+            database="testdb",
+            cache_enabled=True,
+            max_queue_processors=3
+        )
+        try:
+            asyncio.run(async_test(db))
+        except asyncio.CancelledError:
+            pass